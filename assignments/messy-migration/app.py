@@ -3,9 +3,29 @@ from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from config import Config
 from models.user import User
+from models.sharded_user import ShardedUser
+from models.query_profiler import QueryProfiler
+from models.async_user import AsyncUser
 from routes.user_routes import create_user_routes
+from routes.admin_routes import create_admin_routes
+from routes.async_user_routes import create_async_user_routes
+from routes.async_admin_routes import create_async_admin_routes
+from utils.compression import init_compression
+from utils.asgi import AsgiApp, RateLimiter
 import logging
 
+def create_profiler(config):
+    """Create the query profiler, None when profiling is disabled"""
+    if not config.get('QUERY_PROFILING'):
+        return None
+    return QueryProfiler(config.get('SLOW_QUERY_THRESHOLD_MS', 100))
+
+def create_user_model(config, profiler: QueryProfiler = None):
+    """Create the user model, sharded when DATABASE_SHARDS is set"""
+    if config.get('DATABASE_SHARDS'):
+        return ShardedUser(config['DATABASE_SHARDS'], profiler=profiler)
+    return User(config.get('DATABASE_PATH', 'users.db'), profiler=profiler)
+
 def create_app():
     """Application factory"""
     app = Flask(__name__)
@@ -24,16 +44,60 @@ def create_app():
         default_limits=[app.config.get('RATELIMIT_DEFAULT', '100 per hour')]
     )
     limiter.init_app(app)
+    # Route decorators only hold a weak proxy to the limiter, and a disabled
+    # limiter is not kept in app.extensions, so the app keeps it alive
+    app.limiter = limiter
+    
+    # Gzip responses for clients that accept it
+    init_compression(app)
     
     # Initialize models
-    user_model = User(app.config.get('DATABASE_PATH', 'users.db'))
+    profiler = create_profiler(app.config)
+    user_model = create_user_model(app.config, profiler)
     
     # Register blueprints
     user_routes = create_user_routes(user_model, limiter)
     app.register_blueprint(user_routes)
+    if profiler is not None:
+        app.register_blueprint(create_admin_routes(profiler, limiter))
     
     return app
 
+def create_asgi_app():
+    """ASGI application factory exposing the same user routes
+
+    Serve with an ASGI server, e.g. `uvicorn --factory app:create_asgi_app`.
+    """
+    config = {key: getattr(Config, key) for key in dir(Config) if key.isupper()}
+    
+    if config.get('FLASK_ENV') != 'development':
+        logging.basicConfig(
+            level=logging.INFO,
+            format='%(asctime)s %(levelname)s: %(message)s'
+        )
+    
+    limiter = RateLimiter(
+        config.get('RATELIMIT_DEFAULT', '100 per hour'),
+        enabled=config.get('RATELIMIT_ENABLED', True)
+    )
+    
+    # Initialize models behind the async facade
+    profiler = create_profiler(config)
+    user_model = AsyncUser(
+        create_user_model(config, profiler),
+        db_workers=config.get('ASGI_DB_WORKERS', 8),
+        hash_workers=config.get('ASGI_HASH_WORKERS')
+    )
+    
+    router = create_async_user_routes(user_model)
+    if profiler is not None:
+        router.include(create_async_admin_routes(profiler, config.get('ADMIN_TOKEN')))
+    return AsgiApp(
+        router, limiter, on_shutdown=[user_model.close],
+        compression_level=config.get('COMPRESSION_LEVEL', 6),
+        compression_min_size=config.get('COMPRESSION_MIN_SIZE', 1024)
+    )
+
 if __name__ == '__main__':
     app = create_app()
     app.run(host='0.0.0.0', port=5000, debug=(app.config.get('FLASK_ENV') == 'development'))
\ No newline at end of file
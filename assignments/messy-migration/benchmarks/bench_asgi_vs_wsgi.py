@@ -0,0 +1,122 @@
+"""Throughput and latency of the ASGI app against the WSGI app under concurrency.
+
+Run from the project root:
+
+    python -m benchmarks.bench_asgi_vs_wsgi --requests 400 --concurrency 100 --wsgi-threads 8
+
+Both apps are driven in-process against the same fresh database with rate
+limits off. The WSGI app gets a fixed pool of worker threads, as a threaded
+server would; the ASGI app runs every request as a coroutine on one event
+loop. The mix is half GET /user/<id> and half POST /login, so bcrypt and
+SQLite both show up. Idle connection capacity depends on the server; check it
+with `uvicorn --factory app:create_asgi_app` and a load tool.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+def percentiles(latencies):
+    """Median and 99th percentile in milliseconds"""
+    ordered = sorted(latencies)
+    return statistics.median(ordered) * 1000, ordered[int(len(ordered) * 0.99) - 1] * 1000
+
+def request_plan(count: int, user_count: int):
+    """Alternate GET /user/<id> and POST /login requests"""
+    plan = []
+    for i in range(count):
+        user_id = i % user_count + 1
+        if i % 2:
+            plan.append(('POST', '/login', {'email': f"user{user_id}@example.com", 'password': 'password123'}))
+        else:
+            plan.append(('GET', f"/user/{user_id}", None))
+    return plan
+
+async def asgi_request(app, method: str, path: str, body=None) -> int:
+    """Send one request through an ASGI app in-process, returning the status code"""
+    messages = [{'type': 'http.request', 'body': json.dumps(body).encode() if body is not None else b''}]
+    sent = []
+    
+    async def receive():
+        return messages.pop(0) if messages else {'type': 'http.disconnect'}
+    
+    async def send(message):
+        sent.append(message)
+    
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': b'', 'headers': [], 'client': ('127.0.0.1', 0)}
+    await app(scope, receive, send)
+    return sent[0]['status']
+
+def bench_wsgi(plan, threads: int):
+    """Run the plan against the Flask app on a fixed thread pool"""
+    from app import create_app
+    app = create_app()
+    
+    def run(item):
+        method, path, body = item
+        start = time.perf_counter()
+        response = app.test_client().open(path, method=method, json=body)
+        assert response.status_code == 200, response.get_data()
+        return time.perf_counter() - start
+    
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        latencies = list(executor.map(run, plan))
+    return len(plan) / (time.perf_counter() - start), latencies
+
+def bench_asgi(plan, concurrency: int):
+    """Run the plan against the ASGI app with up to concurrency requests in flight"""
+    from app import create_asgi_app
+    app = create_asgi_app()
+    
+    async def run_all():
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def run(item):
+            method, path, body = item
+            async with semaphore:
+                start = time.perf_counter()
+                status = await asgi_request(app, method, path, body)
+                assert status == 200
+                return time.perf_counter() - start
+        
+        return await asyncio.gather(*(run(item) for item in plan))
+    
+    start = time.perf_counter()
+    latencies = asyncio.run(run_all())
+    elapsed = time.perf_counter() - start
+    for callback in app.on_shutdown:
+        callback()
+    return len(plan) / elapsed, latencies
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the ASGI app against the WSGI app")
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--wsgi-threads', type=int, default=8)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_PATH'] = os.path.join(tmp, 'users.db')
+        os.environ['RATELIMIT_ENABLED'] = 'false'
+        os.environ['FLASK_ENV'] = 'development'
+        
+        from models.user import User
+        seed = User(os.environ['DATABASE_PATH'])
+        for i in range(1, args.users + 1):
+            seed.create_user(f"User {i}", f"user{i}@example.com", "password123")
+        
+        plan = request_plan(args.requests, args.users)
+        print(f"{args.requests} requests, {os.cpu_count()} CPUs")
+        print(f"{'app':<28} {'req/s':>7} {'p50 ms':>8} {'p99 ms':>8}")
+        
+        rate, latencies = bench_wsgi(plan, args.wsgi_threads)
+        print(f"{f'WSGI ({args.wsgi_threads} threads)':<28} {rate:>7.1f} {percentiles(latencies)[0]:>8.1f} {percentiles(latencies)[1]:>8.1f}")
+        
+        rate, latencies = bench_asgi(plan, args.concurrency)
+        print(f"{f'ASGI ({args.concurrency} in flight)':<28} {rate:>7.1f} {percentiles(latencies)[0]:>8.1f} {percentiles(latencies)[1]:>8.1f}")
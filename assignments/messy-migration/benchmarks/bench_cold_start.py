@@ -0,0 +1,53 @@
+"""Cost of constructing User, i.e. of a worker or init_db.py starting up.
+
+Run from the project root:
+
+    python -m benchmarks.bench_cold_start --runs 200
+
+Reports the first construction on an empty file (all migrations applied),
+later constructions on a current database (version check only), and for
+comparison the unconditional CREATE TABLE IF NOT EXISTS plus commit that
+every startup used to pay.
+"""
+from models.user import User
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+def time_ms(func) -> float:
+    """Run func once, returning elapsed milliseconds"""
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+def unconditional_ddl(db_path: str):
+    """The pre-migration startup path"""
+    with sqlite3.connect(db_path) as conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                email TEXT UNIQUE NOT NULL,
+                password_hash TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.commit()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark User startup cost")
+    parser.add_argument('--runs', type=int, default=200)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "users.db")
+        first = time_ms(lambda: User(db_path))
+        current = [time_ms(lambda: User(db_path)) for _ in range(args.runs)]
+        legacy = [time_ms(lambda: unconditional_ddl(db_path)) for _ in range(args.runs)]
+    
+    print(f"first start (migrations applied): {first:.2f} ms")
+    print(f"schema current (version check):   median {statistics.median(current):.3f} ms")
+    print(f"unconditional DDL + commit:       median {statistics.median(legacy):.3f} ms")
@@ -0,0 +1,40 @@
+"""CPU time against bytes on the wire for gzip levels on a GET /users body.
+
+Run from the project root:
+
+    python -m benchmarks.bench_compression --users 100000 --levels 1 6 9
+
+The body is produced by streamed_success_response from synthetic users and
+compressed chunk by chunk with gzip_stream, as the API does.
+"""
+from utils.compression import gzip_stream
+from utils.responses import streamed_success_response
+import argparse
+import time
+
+def synthetic_users(count: int):
+    """Yield user dicts shaped like the API output"""
+    for i in range(count):
+        yield {
+            'id': i + 1,
+            'name': f"User Number {i}",
+            'email': f"user{i}@example{i % 50}.com",
+            'created_at': f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d} {i % 24:02d}:{i % 60:02d}:00"
+        }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark response compression levels")
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--levels', type=int, nargs='+', default=[1, 3, 6, 9])
+    args = parser.parse_args()
+    
+    chunks = list(streamed_success_response(synthetic_users(args.users)).iter_encoded())
+    raw_bytes = sum(len(chunk) for chunk in chunks)
+    print(f"{args.users} users, {raw_bytes / 1e6:.1f} MB uncompressed in {len(chunks)} chunks")
+    print(f"{'level':>5} {'MB':>8} {'ratio':>6} {'cpu ms':>8} {'MB/s':>8}")
+    
+    for level in args.levels:
+        start = time.process_time()
+        compressed = sum(len(chunk) for chunk in gzip_stream(chunks, level))
+        cpu = time.process_time() - start
+        print(f"{level:>5} {compressed / 1e6:>8.2f} {raw_bytes / compressed:>6.1f} {cpu * 1000:>8.0f} {raw_bytes / 1e6 / cpu:>8.0f}")
@@ -0,0 +1,55 @@
+"""Write throughput of ShardedUser as the shard count grows.
+
+Run from the project root:
+
+    python -m benchmarks.bench_shard_writes --shards 1 2 4 8 --threads 16
+
+Each configuration gets fresh shard files in a temporary directory. bcrypt is
+turned down to its minimum cost so the numbers reflect SQLite write locking
+rather than password hashing.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from models.sharded_user import ShardedUser
+from models.user import bcrypt
+import argparse
+import os
+import tempfile
+import time
+
+def run_writes(operation, count: int, threads: int) -> float:
+    """Run operation(i) for i in range(count) on a thread pool, returning writes per second"""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(operation, range(count)))
+    return count / (time.perf_counter() - start)
+
+def bench_shard_count(shard_count: int, users: int, threads: int) -> dict:
+    """Measure insert and update throughput for one shard count"""
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [os.path.join(tmp, f"shard{i}.db") for i in range(shard_count)]
+        user_model = ShardedUser(paths)
+        
+        user_ids = []
+        def create(i):
+            user_ids.append(user_model.create_user(f"User {i}", f"user{i}@example.com", "password123"))
+        inserts = run_writes(create, users, threads)
+        
+        def update(i):
+            user_model.update_user(user_ids[i % len(user_ids)], name=f"Renamed {i}")
+        updates = run_writes(update, users, threads)
+        
+        return {'shards': shard_count, 'inserts_per_sec': inserts, 'updates_per_sec': updates}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark sharded write throughput")
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=16)
+    args = parser.parse_args()
+    
+    bcrypt._log_rounds = 4
+    
+    print(f"{'shards':>6} {'inserts/s':>10} {'updates/s':>10}")
+    for shard_count in args.shards:
+        result = bench_shard_count(shard_count, args.users, args.threads)
+        print(f"{result['shards']:>6} {result['inserts_per_sec']:>10.0f} {result['updates_per_sec']:>10.0f}")
@@ -6,8 +6,24 @@ load_dotenv()
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-me'
     DATABASE_PATH = os.environ.get('DATABASE_PATH') or 'users.db'
+    # Comma-separated shard files; when set they replace DATABASE_PATH
+    DATABASE_SHARDS = [p.strip() for p in os.environ.get('DATABASE_SHARDS', '').split(',') if p.strip()]
     FLASK_ENV = os.environ.get('FLASK_ENV') or 'development'
     
     # Rate limiting
     RATELIMIT_STORAGE_URL = "memory://"
-    RATELIMIT_DEFAULT = "100 per hour"
\ No newline at end of file
+    RATELIMIT_DEFAULT = "100 per hour"
+    RATELIMIT_ENABLED = (os.environ.get('RATELIMIT_ENABLED') or 'true').lower() == 'true'
+    
+    # Response compression
+    COMPRESSION_LEVEL = int(os.environ.get('COMPRESSION_LEVEL') or 6)
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE') or 1024)
+    
+    # Query profiling; the report at /admin/query-stats needs ADMIN_TOKEN
+    QUERY_PROFILING = (os.environ.get('QUERY_PROFILING') or 'true').lower() == 'true'
+    SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS') or 100)
+    ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+    
+    # ASGI app worker pools (hash workers default to the CPU count)
+    ASGI_DB_WORKERS = int(os.environ.get('ASGI_DB_WORKERS') or 8)
+    ASGI_HASH_WORKERS = int(os.environ['ASGI_HASH_WORKERS']) if os.environ.get('ASGI_HASH_WORKERS') else None
\ No newline at end of file
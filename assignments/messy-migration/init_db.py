@@ -1,11 +1,15 @@
 from models.user import User
+from models.sharded_user import ShardedUser
 from config import Config
 import logging
 
 def initialize_database():
     """Initialize database with sample data"""
     try:
-        user_model = User(Config.DATABASE_PATH)
+        if Config.DATABASE_SHARDS:
+            user_model = ShardedUser(Config.DATABASE_SHARDS)
+        else:
+            user_model = User(Config.DATABASE_PATH)
         
         # Create sample users
         sample_users = [
@@ -0,0 +1,95 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Executor
+from functools import partial
+from typing import Optional, List, Dict, Any, Callable, Union, Iterator, AsyncIterator
+from models.user import User, STATS_DAYS, STATS_HOURS, STATS_DOMAINS, hash_password, check_password
+from models.sharded_user import ShardedUser
+
+class AsyncUser:
+    """Async facade over User or ShardedUser
+    
+    SQLite calls run on a bounded thread pool and bcrypt hashing on a process
+    pool, so the event loop never blocks and requests beyond the pool sizes
+    wait as cheap coroutines rather than holding threads.
+    """
+    
+    def __init__(self, user_model: Union[User, ShardedUser], db_workers: int = 8, hash_workers: int = None):
+        self.user_model = user_model
+        self._db_executor = ThreadPoolExecutor(max_workers=db_workers, thread_name_prefix='user-db')
+        # Forking a process that already runs the event loop and DB threads
+        # can copy held locks into the workers, so start them from a clean
+        # server, or spawn them where forkserver is unavailable (Windows)
+        start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        self._hash_executor = ProcessPoolExecutor(
+            max_workers=hash_workers,
+            mp_context=multiprocessing.get_context(start_method)
+        )
+    
+    async def _run(self, executor: Executor, func: Callable, *args, **kwargs) -> Any:
+        """Run a blocking call on an executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, partial(func, *args, **kwargs))
+    
+    async def create_user(self, name: str, email: str, password: str) -> Optional[int]:
+        """Create a new user with hashed password"""
+        password_hash = await self._run(self._hash_executor, hash_password, password)
+        return await self._run(self._db_executor, self.user_model.insert_user, name, email, password_hash)
+    
+    async def get_user_by_id(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Get user by ID (without password hash)"""
+        return await self._run(self._db_executor, self.user_model.get_user_by_id, user_id)
+    
+    async def get_all_users(self) -> List[Dict[str, Any]]:
+        """Get all users (without password hashes)"""
+        return await self._run(self._db_executor, self.user_model.get_all_users)
+    
+    async def iter_all_users(self, batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """Get a blocking stream of all users in ID order, its first page already read
+        
+        Advance it with iterate() so later pages are read on the DB pool too.
+        """
+        return await self._run(self._db_executor, self.user_model.iter_all_users, batch_size)
+    
+    async def iterate(self, items: Iterator[Any]) -> AsyncIterator[Any]:
+        """Advance a blocking iterator (e.g. one reading or serializing rows) on the DB pool"""
+        done = object()
+        while True:
+            item = await self._run(self._db_executor, next, items, done)
+            if item is done:
+                return
+            yield item
+    
+    async def update_user(self, user_id: int, name: str = None, email: str = None) -> bool:
+        """Update user information"""
+        return await self._run(self._db_executor, self.user_model.update_user, user_id, name=name, email=email)
+    
+    async def delete_user(self, user_id: int) -> bool:
+        """Delete user by ID"""
+        return await self._run(self._db_executor, self.user_model.delete_user, user_id)
+    
+    async def search_users_by_name(self, name: str) -> List[Dict[str, Any]]:
+        """Search users by name (partial match)"""
+        return await self._run(self._db_executor, self.user_model.search_users_by_name, name)
+    
+    async def authenticate_user(self, email: str, password: str) -> Optional[Dict[str, Any]]:
+        """Authenticate user with email and password"""
+        row = await self._run(self._db_executor, self.user_model.get_credentials, email)
+        
+        if row and await self._run(self._hash_executor, check_password, row['password_hash'], password):
+            return {
+                'id': row['id'],
+                'name': row['name'],
+                'email': row['email']
+            }
+        return None
+    
+    async def get_stats(self, days: Optional[int] = STATS_DAYS, hours: Optional[int] = STATS_HOURS,
+                        domains: Optional[int] = STATS_DOMAINS) -> Dict[str, Any]:
+        """Get precomputed user statistics"""
+        return await self._run(self._db_executor, self.user_model.get_stats, days, hours, domains)
+    
+    def close(self):
+        """Shut down the worker pools"""
+        self._db_executor.shutdown(wait=True)
+        self._hash_executor.shutdown(wait=True)
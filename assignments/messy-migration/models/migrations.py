@@ -0,0 +1,177 @@
+import sqlite3
+import logging
+from typing import List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# SQL expressions bucketing a users row for the summary tables; {row} is NEW, OLD or users
+_DAY = "substr({row}.created_at, 1, 10)"
+_HOUR = "substr({row}.created_at, 1, 13) || ':00'"
+_DOMAIN = "lower(substr({row}.email, instr({row}.email, '@') + 1))"
+
+# Ordered (version, description, statements). The database records the last
+# version applied in PRAGMA user_version; append new migrations, never edit
+# ones that have shipped. Statements stay idempotent so databases created
+# before versioning existed upgrade cleanly from version 0.
+MIGRATIONS: List[Tuple[int, str, List[str]]] = [
+    (1, "Create users table", [
+        '''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+    ]),
+    (2, "Create user statistics summary tables and triggers", [
+        '''
+        CREATE TABLE IF NOT EXISTS user_stats (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            total_users INTEGER NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS user_signups_daily (
+            day TEXT PRIMARY KEY,
+            signups INTEGER NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS user_signups_hourly (
+            hour TEXT PRIMARY KEY,
+            signups INTEGER NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS user_email_domains (
+            domain TEXT PRIMARY KEY,
+            users INTEGER NOT NULL
+        )
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS users_stats_insert AFTER INSERT ON users
+        BEGIN
+            UPDATE user_stats SET total_users = total_users + 1 WHERE id = 1;
+            INSERT INTO user_signups_daily (day, signups) VALUES ({_DAY.format(row='NEW')}, 1)
+                ON CONFLICT(day) DO UPDATE SET signups = signups + 1;
+            INSERT INTO user_signups_hourly (hour, signups) VALUES ({_HOUR.format(row='NEW')}, 1)
+                ON CONFLICT(hour) DO UPDATE SET signups = signups + 1;
+            INSERT INTO user_email_domains (domain, users) VALUES ({_DOMAIN.format(row='NEW')}, 1)
+                ON CONFLICT(domain) DO UPDATE SET users = users + 1;
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS users_stats_delete AFTER DELETE ON users
+        BEGIN
+            UPDATE user_stats SET total_users = total_users - 1 WHERE id = 1;
+            UPDATE user_signups_daily SET signups = signups - 1 WHERE day = {_DAY.format(row='OLD')};
+            DELETE FROM user_signups_daily WHERE signups <= 0;
+            UPDATE user_signups_hourly SET signups = signups - 1 WHERE hour = {_HOUR.format(row='OLD')};
+            DELETE FROM user_signups_hourly WHERE signups <= 0;
+            UPDATE user_email_domains SET users = users - 1 WHERE domain = {_DOMAIN.format(row='OLD')};
+            DELETE FROM user_email_domains WHERE users <= 0;
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS users_stats_update_email AFTER UPDATE OF email ON users
+        WHEN {_DOMAIN.format(row='OLD')} != {_DOMAIN.format(row='NEW')}
+        BEGIN
+            UPDATE user_email_domains SET users = users - 1 WHERE domain = {_DOMAIN.format(row='OLD')};
+            DELETE FROM user_email_domains WHERE users <= 0;
+            INSERT INTO user_email_domains (domain, users) VALUES ({_DOMAIN.format(row='NEW')}, 1)
+                ON CONFLICT(domain) DO UPDATE SET users = users + 1;
+        END
+        ''',
+        # Backfill from any users already present
+        "INSERT OR REPLACE INTO user_stats (id, total_users) SELECT 1, COUNT(*) FROM users",
+        "DELETE FROM user_signups_daily",
+        f"INSERT INTO user_signups_daily (day, signups) SELECT {_DAY.format(row='users')}, COUNT(*) FROM users GROUP BY 1",
+        "DELETE FROM user_signups_hourly",
+        f"INSERT INTO user_signups_hourly (hour, signups) SELECT {_HOUR.format(row='users')}, COUNT(*) FROM users GROUP BY 1",
+        "DELETE FROM user_email_domains",
+        f"INSERT INTO user_email_domains (domain, users) SELECT {_DOMAIN.format(row='users')}, COUNT(*) FROM users GROUP BY 1",
+    ]),
+    (3, "Index users by name and created_at", [
+        "CREATE INDEX IF NOT EXISTS idx_users_name ON users (name)",
+        "CREATE INDEX IF NOT EXISTS idx_users_created_at ON users (created_at)",
+    ]),
+    (4, "Create shard email index and id allocator", [
+        '''
+        CREATE TABLE IF NOT EXISTS email_index (
+            email TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS id_allocator (
+            id INTEGER PRIMARY KEY CHECK (id = 0),
+            next_id INTEGER NOT NULL
+        )
+        ''',
+    ]),
+    (5, "Record the position of a shard in its shard set", [
+        '''
+        CREATE TABLE IF NOT EXISTS shard_meta (
+            id INTEGER PRIMARY KEY CHECK (id = 0),
+            shard_index INTEGER NOT NULL,
+            shard_count INTEGER NOT NULL
+        )
+        ''',
+    ]),
+    (6, "Index email domains by user count", [
+        "CREATE INDEX IF NOT EXISTS idx_user_email_domains_users ON user_email_domains (users DESC, domain)",
+    ]),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Get the schema version recorded in the database header"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def check_schema_version(db_path: str, version: int) -> int:
+    """Return the version, raising ValueError if it is newer than this code knows"""
+    if version > SCHEMA_VERSION:
+        raise ValueError(
+            f"{db_path} has schema version {version} but this code only knows up to "
+            f"{SCHEMA_VERSION}; upgrade the application before using this database"
+        )
+    return version
+
+def migrate(db_path: str) -> List[int]:
+    """Apply pending migrations, returning the versions applied
+    
+    When the database is already current this is a single header read with no
+    DDL and no write lock. Otherwise every pending migration runs in one
+    immediate transaction, so concurrent workers starting together apply
+    each migration exactly once. A database migrated by newer code raises
+    ValueError rather than being used with a schema this code does not know.
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        if check_schema_version(db_path, get_schema_version(conn)) == SCHEMA_VERSION:
+            return []
+        
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have migrated while we waited for the lock
+            current = check_schema_version(db_path, get_schema_version(conn))
+            applied = []
+            for version, description, statements in MIGRATIONS:
+                if version <= current:
+                    continue
+                for statement in statements:
+                    conn.execute(statement)
+                applied.append(version)
+                logger.info(f"Applied migration {version} to {db_path}: {description}")
+            
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.execute("COMMIT")
+            return applied
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
@@ -0,0 +1,226 @@
+import re
+import sqlite3
+import threading
+import time
+import logging
+from typing import Optional, List, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+# Statements EXPLAIN QUERY PLAN can describe
+_EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE', 'WITH')
+_INSERT_COLUMNS = re.compile(r'^\s*(?:INSERT|REPLACE)\b.*?\bINTO\s+\w+\s*\(([^)]*)\)', re.I | re.S)
+_PLACEHOLDER = re.compile(r'(?:(\w+)\s*(?:=|==|!=|<>|<=|>=|<|>|\bLIKE\b)\s*)?\?', re.I)
+_REDACTED = '***'
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace so the same statement always has the same key"""
+    return ' '.join(sql.split())
+
+def redact_params(sql: str, params: Any) -> Any:
+    """Mask parameters bound to password columns or that look like bcrypt hashes"""
+    if isinstance(params, dict):
+        return {
+            key: _REDACTED if 'password' in key.lower() or _looks_like_hash(value) else value
+            for key, value in params.items()
+        }
+    
+    insert = _INSERT_COLUMNS.match(sql)
+    if insert:
+        columns = [column.strip() for column in insert.group(1).split(',')]
+    else:
+        columns = [match.group(1) or '' for match in _PLACEHOLDER.finditer(sql)]
+    
+    redacted = []
+    for index, value in enumerate(params):
+        column = columns[index] if index < len(columns) else ''
+        redacted.append(_REDACTED if 'password' in column.lower() or _looks_like_hash(value) else value)
+    return tuple(redacted)
+
+def _looks_like_hash(value: Any) -> bool:
+    """Check whether a value looks like a bcrypt password hash"""
+    return isinstance(value, str) and len(value) == 60 and value.startswith('$2')
+
+class QueryProfiler:
+    """Per-statement timing, slow-query logging and query-plan capture
+    
+    A statement's time covers execute plus every fetch of its rows, and is
+    recorded once its cursor is exhausted, closed or discarded. The first time
+    a statement is seen its EXPLAIN QUERY PLAN is stored and full scans are
+    flagged, with ``index_scan`` set when every scan reads an index rather
+    than the table.
+    """
+    
+    def __init__(self, slow_threshold_ms: float = 100.0):
+        self.slow_threshold_ms = slow_threshold_ms
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, Any]] = {}
+    
+    def record(self, conn: sqlite3.Connection, sql: str, params: Any, elapsed_ms: float):
+        """Add one execution to the statement's totals, logging it if slow"""
+        key = normalize_sql(sql)
+        with self._lock:
+            stats = self._stats.get(key)
+            first_seen = stats is None
+            if first_seen:
+                stats = self._stats[key] = {
+                    'sql': key,
+                    'calls': 0,
+                    'total_ms': 0.0,
+                    'max_ms': 0.0,
+                    'slow_calls': 0,
+                    'plan': [],
+                    'full_scan': False,
+                    'index_scan': False
+                }
+            stats['calls'] += 1
+            stats['total_ms'] += elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+            slow = elapsed_ms >= self.slow_threshold_ms
+            if slow:
+                stats['slow_calls'] += 1
+        
+        if slow:
+            logger.warning(f"Slow query ({elapsed_ms:.1f} ms): {key} params={redact_params(sql, params)}")
+        if first_seen:
+            self._capture_plan(conn, key, sql, params)
+    
+    def _capture_plan(self, conn: sqlite3.Connection, key: str, sql: str, params: Any):
+        """Store EXPLAIN QUERY PLAN for a statement and flag full table scans"""
+        if not key.upper().startswith(_EXPLAINABLE):
+            return
+        try:
+            rows = sqlite3.Connection.execute(conn, f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+        except sqlite3.Error as e:
+            logger.debug(f"Could not explain {key}: {str(e)}")
+            return
+        
+        plan = [row[-1] for row in rows]
+        # Any SCAN reads every row, even through an index; only SEARCH is a lookup
+        scans = [step for step in plan if step.startswith('SCAN') and 'CONSTANT ROW' not in step]
+        full_scan = bool(scans)
+        index_scan = full_scan and all('INDEX' in step for step in scans)
+        with self._lock:
+            self._stats[key]['plan'] = plan
+            self._stats[key]['full_scan'] = full_scan
+            self._stats[key]['index_scan'] = index_scan
+        if full_scan:
+            kind = 'index' if index_scan else 'table'
+            logger.info(f"Full {kind} scan in query plan: {key} -> {'; '.join(plan)}")
+    
+    def report(self) -> List[Dict[str, Any]]:
+        """Get per-statement totals, most expensive first"""
+        with self._lock:
+            report = [
+                dict(stats, plan=list(stats['plan']), avg_ms=stats['total_ms'] / stats['calls'])
+                for stats in self._stats.values()
+            ]
+        return sorted(report, key=lambda stats: stats['total_ms'], reverse=True)
+    
+    def reset(self):
+        """Forget all statements seen so far"""
+        with self._lock:
+            self._stats.clear()
+
+class ProfiledCursor(sqlite3.Cursor):
+    """sqlite3 cursor timing a statement from execute until its rows are consumed"""
+    
+    _pending: Optional[List[Any]] = None
+    
+    def _profiler(self) -> Optional[QueryProfiler]:
+        """Get the profiler of the owning connection"""
+        return getattr(self.connection, 'profiler', None)
+    
+    def _timed(self, func, *args) -> Any:
+        """Call func, adding its time to the pending statement"""
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            if self._pending is not None:
+                self._pending[2] += (time.perf_counter() - start) * 1000
+    
+    def _finish(self):
+        """Record the pending statement, if any"""
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            sql, parameters, elapsed_ms = pending
+            self._profiler().record(self.connection, sql, parameters, elapsed_ms)
+    
+    def execute(self, sql: str, parameters: Any = (), /) -> sqlite3.Cursor:
+        """Execute a statement, timing it until its rows are consumed"""
+        self._finish()
+        if self._profiler() is None:
+            return super().execute(sql, parameters)
+        
+        self._pending = [sql, parameters, 0.0]
+        self._timed(super().execute, sql, parameters)
+        if self.description is None:
+            self._finish()  # No rows to fetch
+        return self
+    
+    def executemany(self, sql: str, seq_of_parameters: Any, /) -> sqlite3.Cursor:
+        """Execute a statement for each parameter set, timed as one call"""
+        self._finish()
+        if self._profiler() is None:
+            return super().executemany(sql, seq_of_parameters)
+        
+        seq_of_parameters = list(seq_of_parameters)
+        self._pending = [sql, seq_of_parameters[0] if seq_of_parameters else (), 0.0]
+        self._timed(super().executemany, sql, seq_of_parameters)
+        self._finish()
+        return self
+    
+    def fetchone(self) -> Any:
+        """Fetch the next row, recording the statement once none are left"""
+        row = self._timed(super().fetchone)
+        if row is None:
+            self._finish()
+        return row
+    
+    def fetchmany(self, size: Optional[int] = None) -> List[Any]:
+        """Fetch up to size rows, recording the statement once none are left"""
+        size = self.arraysize if size is None else size
+        rows = self._timed(super().fetchmany, size)
+        if len(rows) < size:
+            self._finish()
+        return rows
+    
+    def fetchall(self) -> List[Any]:
+        """Fetch the remaining rows and record the statement"""
+        rows = self._timed(super().fetchall)
+        self._finish()
+        return rows
+    
+    def __next__(self) -> Any:
+        """Iterate rows through fetchone so they are timed"""
+        row = self.fetchone()
+        if row is None:
+            raise StopIteration
+        return row
+    
+    def close(self):
+        """Record the pending statement and close the cursor"""
+        self._finish()
+        super().close()
+    
+    def __del__(self):
+        """Record a statement whose cursor is dropped before its rows run out"""
+        self._finish()
+
+class ProfiledConnection(sqlite3.Connection):
+    """sqlite3 connection reporting every statement to its profiler"""
+    
+    profiler: Optional[QueryProfiler] = None
+    
+    def cursor(self, factory: type = ProfiledCursor) -> sqlite3.Cursor:
+        """Get a cursor, profiled unless another factory is given"""
+        return super().cursor(factory)
+    
+    def execute(self, sql: str, parameters: Any = (), /) -> sqlite3.Cursor:
+        """Execute a statement on a new profiled cursor"""
+        return self.cursor().execute(sql, parameters)
+    
+    def executemany(self, sql: str, seq_of_parameters: Any, /) -> sqlite3.Cursor:
+        """Execute a statement for each parameter set on a new profiled cursor"""
+        return self.cursor().executemany(sql, seq_of_parameters)
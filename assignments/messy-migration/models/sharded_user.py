@@ -0,0 +1,359 @@
+import sqlite3
+import heapq
+import threading
+import zlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Any, Callable, Iterator
+from models.user import User, STATS_DAYS, STATS_HOURS, STATS_DOMAINS, hash_password
+from models.query_profiler import QueryProfiler
+
+class ShardedUser:
+    """User model spread over several SQLite files.
+    
+    Users live on the shard picked by ``id % len(shards)``, and each shard
+    records its position so a reordered or resized list is refused. Each shard
+    also holds an ``email_index`` for the emails that hash to it, which routes
+    email lookups and enforces email uniqueness across shards. Ids come from a
+    counter on the first shard, reserved in blocks so that shard is not
+    written on every insert (ids left in a block at shutdown are skipped).
+    """
+    
+    def __init__(self, shard_paths: List[str], id_block_size: int = 100, profiler: Optional[QueryProfiler] = None):
+        if not shard_paths:
+            raise ValueError("At least one shard path is required")
+        
+        self.shard_paths = list(shard_paths)
+        self.shards = [User(path, profiler=profiler) for path in self.shard_paths]
+        self.id_block_size = id_block_size
+        self._id_lock = threading.Lock()
+        self._next_id = 0
+        self._id_limit = 0
+        self._executor = ThreadPoolExecutor(max_workers=len(self.shards))
+        self._init_shards()
+    
+    def _init_shards(self):
+        """Check every file is the shard it is configured as, seeding the first use of a set
+        
+        Each shard records its position and the shard count in ``shard_meta``;
+        startup stops with a ValueError when that disagrees with the
+        configured shard list. A shard without a record (new, or a former
+        unsharded database) must only hold users whose ID routes to it, since
+        others could never be found. Existing data in any other layout has to
+        go through rebalance_shards.py.
+        
+        On first use of a set, existing users get an email index entry and the
+        allocator starts past the highest existing ID. Emails duplicated
+        across shards cannot be indexed and also stop startup.
+        """
+        unrecorded = [index for index in range(len(self.shards)) if not self._check_shard_meta(index)]
+        
+        with self.shards[0]._get_connection() as conn:
+            initialized = conn.execute("SELECT 1 FROM id_allocator WHERE id = 0").fetchone() is not None
+        if initialized and not unrecorded:
+            return
+        
+        for index in unrecorded:
+            self._check_placement(index)
+        for index in unrecorded:
+            with self.shards[index]._get_connection() as conn:
+                conn.execute(
+                    "INSERT OR IGNORE INTO shard_meta (id, shard_index, shard_count) VALUES (0, ?, ?)",
+                    (index, len(self.shards))
+                )
+            # Another process may have recorded a different layout meanwhile
+            self._check_shard_meta(index)
+        
+        if not initialized:
+            self._seed_shards()
+    
+    def _seed_shards(self):
+        """Build the email index and ID allocator of a new shard set, exactly once
+        
+        Runs under a write lock on the first shard, taken before checking for
+        the allocator and held until it is inserted, so concurrent workers
+        starting together wait and then find the set seeded. No user can be
+        created before the allocator exists, so the counts compared below
+        cannot be disturbed by inserts.
+        """
+        # Seeding a large former database can take a while; wait for it
+        lock = sqlite3.connect(self.shard_paths[0], isolation_level=None, timeout=300)
+        lock.row_factory = sqlite3.Row
+        try:
+            lock.execute("BEGIN IMMEDIATE")
+            try:
+                if lock.execute("SELECT 1 FROM id_allocator WHERE id = 0").fetchone():
+                    lock.execute("ROLLBACK")
+                    return
+                
+                max_id = 0
+                total_users = 0
+                for index, shard in enumerate(self.shards):
+                    conn = lock if index == 0 else shard._get_connection()
+                    try:
+                        cursor = conn.execute("SELECT id, email FROM users ORDER BY id")
+                        while True:
+                            rows = cursor.fetchmany(1000)
+                            if not rows:
+                                break
+                            self._index_emails(rows, lock)
+                            max_id = max(max_id, rows[-1]['id'])
+                            total_users += len(rows)
+                    finally:
+                        if conn is not lock:
+                            conn.close()
+                
+                indexed = lock.execute("SELECT COUNT(*) AS entries FROM email_index").fetchone()['entries']
+                for shard in self.shards[1:]:
+                    with shard._get_connection() as conn:
+                        indexed += conn.execute("SELECT COUNT(*) AS entries FROM email_index").fetchone()['entries']
+                if indexed != total_users:
+                    raise ValueError(
+                        f"Cannot build the email index: {total_users} users but {indexed} distinct "
+                        f"index entries, check the shards for duplicate emails"
+                    )
+                
+                lock.execute("INSERT INTO id_allocator (id, next_id) VALUES (0, ?)", (max_id + 1,))
+                lock.execute("COMMIT")
+            except BaseException:
+                lock.execute("ROLLBACK")
+                raise
+        finally:
+            lock.close()
+    
+    def _check_shard_meta(self, index: int) -> bool:
+        """Check the recorded position of a shard, False if it has none yet"""
+        with self.shards[index]._get_connection() as conn:
+            row = conn.execute("SELECT shard_index, shard_count FROM shard_meta WHERE id = 0").fetchone()
+        if row is None:
+            return False
+        if row['shard_index'] != index or row['shard_count'] != len(self.shards):
+            raise ValueError(
+                f"{self.shard_paths[index]} is shard {row['shard_index']} of {row['shard_count']} "
+                f"but is configured as shard {index} of {len(self.shards)}; keep the original "
+                f"DATABASE_SHARDS order or move the data with rebalance_shards.py"
+            )
+        return True
+    
+    def _check_placement(self, index: int):
+        """Check a shard holds only users whose ID routes to it"""
+        with self.shards[index]._get_connection() as conn:
+            row = conn.execute(
+                "SELECT id FROM users WHERE id % ? != ? LIMIT 1",
+                (len(self.shards), index)
+            ).fetchone()
+        if row is not None:
+            raise ValueError(
+                f"{self.shard_paths[index]} holds user {row['id']}, which belongs on shard "
+                f"{self.shard_index_for_id(row['id'])} of {len(self.shards)}; move existing data "
+                f"onto the shards with rebalance_shards.py"
+            )
+    
+    def _index_emails(self, rows: List[sqlite3.Row], first_shard: sqlite3.Connection):
+        """Add email index entries for existing users, skipping ones already present
+        
+        Entries for the first shard go through first_shard, the connection
+        holding its write lock while seeding.
+        """
+        entries_by_shard = {}
+        for row in rows:
+            entries_by_shard.setdefault(self.shard_index_for_email(row['email']), []).append((row['email'], row['id']))
+        
+        for index, entries in entries_by_shard.items():
+            if index == 0:
+                first_shard.executemany(
+                    "INSERT OR IGNORE INTO email_index (email, user_id) VALUES (?, ?)",
+                    entries
+                )
+                continue
+            with self.shards[index]._get_connection() as conn:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO email_index (email, user_id) VALUES (?, ?)",
+                    entries
+                )
+    
+    def shard_index_for_id(self, user_id: int) -> int:
+        """Get the position of the shard holding the user with this ID"""
+        return user_id % len(self.shards)
+    
+    def shard_index_for_email(self, email: str) -> int:
+        """Get the position of the shard holding the email index entry for this email"""
+        return zlib.crc32(email.encode('utf-8')) % len(self.shards)
+    
+    def shard_for_id(self, user_id: int) -> User:
+        """Get the shard holding the user with this ID"""
+        return self.shards[self.shard_index_for_id(user_id)]
+    
+    def shard_for_email(self, email: str) -> User:
+        """Get the shard holding the email index entry for this email"""
+        return self.shards[self.shard_index_for_email(email)]
+    
+    def _scatter(self, func: Callable[[User], Any]) -> List[Any]:
+        """Run func against every shard in parallel"""
+        return list(self._executor.map(func, self.shards))
+    
+    def _allocate_id(self) -> int:
+        """Get the next globally unique user ID"""
+        with self._id_lock:
+            if self._next_id >= self._id_limit:
+                with self.shards[0]._get_connection() as conn:
+                    conn.execute(
+                        "UPDATE id_allocator SET next_id = next_id + ? WHERE id = 0",
+                        (self.id_block_size,)
+                    )
+                    row = conn.execute("SELECT next_id FROM id_allocator WHERE id = 0").fetchone()
+                self._id_limit = row['next_id']
+                self._next_id = self._id_limit - self.id_block_size
+            
+            user_id = self._next_id
+            self._next_id += 1
+            return user_id
+    
+    def _claim_email(self, email: str, user_id: int) -> bool:
+        """Reserve an email for a user, False if it is already taken"""
+        try:
+            with self.shard_for_email(email)._get_connection() as conn:
+                conn.execute(
+                    "INSERT INTO email_index (email, user_id) VALUES (?, ?)",
+                    (email, user_id)
+                )
+                return True
+        except sqlite3.IntegrityError:
+            return False
+    
+    def _release_email(self, email: str, user_id: int):
+        """Drop an email index entry owned by a user"""
+        with self.shard_for_email(email)._get_connection() as conn:
+            conn.execute(
+                "DELETE FROM email_index WHERE email = ? AND user_id = ?",
+                (email, user_id)
+            )
+    
+    def _lookup_email(self, email: str) -> Optional[int]:
+        """Get the ID of the user owning an email"""
+        with self.shard_for_email(email)._get_connection() as conn:
+            row = conn.execute(
+                "SELECT user_id FROM email_index WHERE email = ?",
+                (email,)
+            ).fetchone()
+            return row['user_id'] if row else None
+    
+    def create_user(self, name: str, email: str, password: str) -> Optional[int]:
+        """Create a new user on the shard chosen by its ID"""
+        return self.insert_user(name, email, hash_password(password))
+    
+    def insert_user(self, name: str, email: str, password_hash: str) -> Optional[int]:
+        """Create a new user whose password is already hashed"""
+        user_id = self._allocate_id()
+        if not self._claim_email(email, user_id):
+            return None  # Email already exists
+        
+        try:
+            created_id = self.shard_for_id(user_id).insert_user(name, email, password_hash, user_id=user_id)
+        except BaseException:
+            self._release_email(email, user_id)
+            raise
+        if created_id is None:
+            self._release_email(email, user_id)
+        return created_id
+    
+    def get_user_by_id(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Get user by ID (without password hash)"""
+        return self.shard_for_id(user_id).get_user_by_id(user_id)
+    
+    def get_all_users(self) -> List[Dict[str, Any]]:
+        """Get all users from every shard, ordered by ID"""
+        results = self._scatter(lambda shard: shard.get_all_users())
+        return sorted((user for users in results for user in users), key=lambda user: user['id'])
+    
+    def iter_all_users(self, batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """Stream all users from every shard in ID order, merging the shard streams lazily"""
+        streams = [shard.iter_all_users(batch_size) for shard in self.shards]
+        return heapq.merge(*streams, key=lambda user: user['id'])
+    
+    def update_user(self, user_id: int, name: str = None, email: str = None) -> bool:
+        """Update user information, moving the email index entry if the email changes"""
+        shard = self.shard_for_id(user_id)
+        if not email:
+            return shard.update_user(user_id, name=name)
+        
+        user = shard.get_user_by_id(user_id)
+        if not user:
+            return False
+        if user['email'] == email:
+            return shard.update_user(user_id, name=name, email=email)
+        
+        if not self._claim_email(email, user_id):
+            return False  # Email already exists
+        
+        try:
+            success = shard.update_user(user_id, name=name, email=email)
+        except BaseException:
+            self._release_email(email, user_id)
+            raise
+        self._release_email(user['email'] if success else email, user_id)
+        return success
+    
+    def delete_user(self, user_id: int) -> bool:
+        """Delete user by ID"""
+        shard = self.shard_for_id(user_id)
+        user = shard.get_user_by_id(user_id)
+        if not user:
+            return False
+        
+        success = shard.delete_user(user_id)
+        if success:
+            self._release_email(user['email'], user_id)
+        return success
+    
+    def search_users_by_name(self, name: str) -> List[Dict[str, Any]]:
+        """Search users by name on every shard, ordered by ID"""
+        results = self._scatter(lambda shard: shard.search_users_by_name(name))
+        return sorted((user for users in results for user in users), key=lambda user: user['id'])
+    
+    def get_credentials(self, email: str) -> Optional[Dict[str, Any]]:
+        """Get user by email including the password hash, for authentication only"""
+        user_id = self._lookup_email(email)
+        if user_id is None:
+            return None
+        return self.shard_for_id(user_id).get_credentials(email)
+    
+    def authenticate_user(self, email: str, password: str) -> Optional[Dict[str, Any]]:
+        """Authenticate user with email and password"""
+        user_id = self._lookup_email(email)
+        if user_id is None:
+            return None
+        return self.shard_for_id(user_id).authenticate_user(email, password)
+    
+    def get_stats(self, days: Optional[int] = STATS_DAYS, hours: Optional[int] = STATS_HOURS,
+                  domains: Optional[int] = STATS_DOMAINS) -> Dict[str, Any]:
+        """Get user statistics summed over every shard, windowed as in User.get_stats
+        
+        Domains in any shard's top list are counted again on every shard, so
+        the merged counts are exact and the largest of them are returned.
+        """
+        signups_per_day = Counter()
+        signups_per_hour = Counter()
+        email_domains = Counter()
+        total_users = 0
+        
+        for stats in self._scatter(lambda shard: shard.get_stats(days, hours, domains)):
+            total_users += stats['total_users']
+            signups_per_day.update(stats['signups_per_day'])
+            signups_per_hour.update(stats['signups_per_hour'])
+            email_domains.update(stats['email_domains'])
+        
+        if domains is not None and len(self.shards) > 1:
+            candidates = sorted(email_domains)
+            email_domains = Counter()
+            for counts in self._scatter(lambda shard: shard.count_email_domains(candidates)):
+                email_domains.update(counts)
+        top_domains = sorted(email_domains.items(), key=lambda item: (-item[1], item[0]))[:domains]
+        
+        return {
+            'total_users': total_users,
+            'signups_per_day': dict(sorted(signups_per_day.items())),
+            'signups_per_hour': dict(sorted(signups_per_hour.items())),
+            'email_domains': dict(top_domains),
+            'email_domains_other': total_users - sum(users for _, users in top_domains)
+        }
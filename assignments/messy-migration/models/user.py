@@ -1,43 +1,70 @@
 import sqlite3
-from typing import Optional, List, Dict, Any
+import time
+import logging
+from typing import Optional, List, Dict, Any, Iterator
 from flask_bcrypt import Bcrypt
+from models.migrations import migrate
+from models.query_profiler import QueryProfiler, ProfiledConnection
 
 bcrypt = Bcrypt()
 
+logger = logging.getLogger(__name__)
+
+# Signup windows and email domain count returned by get_stats: defaults and
+# the most a request may ask for
+STATS_DAYS = 90
+STATS_HOURS = 7 * 24
+STATS_DOMAINS = 20
+MAX_STATS_DAYS = 10 * 366
+MAX_STATS_HOURS = 366 * 24
+MAX_STATS_DOMAINS = 1000
+
+def hash_password(password: str) -> str:
+    """Hash a password with bcrypt (module level so it can run in a process pool)"""
+    return bcrypt.generate_password_hash(password).decode('utf-8')
+
+def check_password(password_hash: str, password: str) -> bool:
+    """Check a password against its bcrypt hash"""
+    return bcrypt.check_password_hash(password_hash, password)
+
 class User:
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, profiler: Optional[QueryProfiler] = None):
         self.db_path = db_path
+        self.profiler = profiler
         self._init_db()
     
     def _init_db(self):
-        """Initialize database connection and create tables if needed"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    email TEXT UNIQUE NOT NULL,
-                    password_hash TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            conn.commit()
+        """Bring the database schema up to date (a no-op when it already is)"""
+        start = time.perf_counter()
+        applied = migrate(self.db_path)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        
+        if applied:
+            logger.info(f"Migrated {self.db_path} to schema version {applied[-1]} in {elapsed_ms:.1f} ms")
+        else:
+            logger.info(f"Schema of {self.db_path} is current, startup check took {elapsed_ms:.1f} ms")
     
     def _get_connection(self):
-        """Get database connection with row factory"""
-        conn = sqlite3.connect(self.db_path)
+        """Get database connection with row factory (profiled when a profiler is set)"""
+        if self.profiler is None:
+            conn = sqlite3.connect(self.db_path)
+        else:
+            conn = sqlite3.connect(self.db_path, factory=ProfiledConnection)
+            conn.profiler = self.profiler
         conn.row_factory = sqlite3.Row
         return conn
     
-    def create_user(self, name: str, email: str, password: str) -> Optional[int]:
-        """Create a new user with hashed password"""
+    def create_user(self, name: str, email: str, password: str, user_id: int = None) -> Optional[int]:
+        """Create a new user with hashed password (user_id is normally assigned by SQLite)"""
+        return self.insert_user(name, email, hash_password(password), user_id=user_id)
+    
+    def insert_user(self, name: str, email: str, password_hash: str, user_id: int = None) -> Optional[int]:
+        """Create a new user whose password is already hashed"""
         try:
-            password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
-            
             with self._get_connection() as conn:
                 cursor = conn.execute(
-                    "INSERT INTO users (name, email, password_hash) VALUES (?, ?, ?)",
-                    (name, email, password_hash)
+                    "INSERT INTO users (id, name, email, password_hash) VALUES (?, ?, ?, ?)",
+                    (user_id, name, email, password_hash)
                 )
                 return cursor.lastrowid
         except sqlite3.IntegrityError:
@@ -59,6 +86,36 @@ class User:
             cursor = conn.execute("SELECT id, name, email, created_at FROM users")
             return [dict(row) for row in cursor.fetchall()]
     
+    def iter_all_users(self, batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """Stream all users (without password hashes) in ID order, batch_size rows at a time
+        
+        Rows are read in keyset pages, each on its own short-lived connection,
+        so no read lock is held while the caller is busy with a page. The first
+        page is read immediately so errors surface to the caller.
+        """
+        rows = self._get_users_page(0, batch_size)
+        return self._iter_pages(rows, batch_size)
+    
+    def _get_users_page(self, after_id: int, limit: int) -> List[Dict[str, Any]]:
+        """Get up to limit users with an ID above after_id, in ID order"""
+        conn = self._get_connection()
+        try:
+            cursor = conn.execute(
+                "SELECT id, name, email, created_at FROM users WHERE id > ? ORDER BY id LIMIT ?",
+                (after_id, limit)
+            )
+            return [dict(row) for row in cursor.fetchall()]
+        finally:
+            conn.close()
+    
+    def _iter_pages(self, rows: List[Dict[str, Any]], batch_size: int) -> Iterator[Dict[str, Any]]:
+        """Yield users page by page, starting from an already fetched page"""
+        while rows:
+            yield from rows
+            if len(rows) < batch_size:
+                break
+            rows = self._get_users_page(rows[-1]['id'], batch_size)
+    
     def update_user(self, user_id: int, name: str = None, email: str = None) -> bool:
         """Update user information"""
         if not name and not email:
@@ -101,19 +158,82 @@ class User:
             )
             return [dict(row) for row in cursor.fetchall()]
     
-    def authenticate_user(self, email: str, password: str) -> Optional[Dict[str, Any]]:
-        """Authenticate user with email and password"""
+    def get_credentials(self, email: str) -> Optional[Dict[str, Any]]:
+        """Get user by email including the password hash, for authentication only"""
         with self._get_connection() as conn:
             cursor = conn.execute(
                 "SELECT id, name, email, password_hash FROM users WHERE email = ?",
                 (email,)
             )
             row = cursor.fetchone()
+            return dict(row) if row else None
+    
+    def authenticate_user(self, email: str, password: str) -> Optional[Dict[str, Any]]:
+        """Authenticate user with email and password"""
+        row = self.get_credentials(email)
+        
+        if row and check_password(row['password_hash'], password):
+            return {
+                'id': row['id'],
+                'name': row['name'],
+                'email': row['email']
+            }
+        return None
+    
+    def get_stats(self, days: Optional[int] = STATS_DAYS, hours: Optional[int] = STATS_HOURS,
+                  domains: Optional[int] = STATS_DOMAINS) -> Dict[str, Any]:
+        """Get precomputed user statistics (total, signups per day/hour, email domains)
+        
+        Signups cover the last `days` daily and `hours` hourly buckets up to
+        now (UTC, like created_at), and email domains the `domains` largest,
+        with the users of every other domain summed in email_domains_other.
+        A read touches a bounded number of rows however long the history is
+        or however many domains there are. None returns everything.
+        """
+        with self._get_connection() as conn:
+            row = conn.execute("SELECT total_users FROM user_stats WHERE id = 1").fetchone()
+            if days is None:
+                daily = conn.execute("SELECT day, signups FROM user_signups_daily ORDER BY day")
+            else:
+                daily = conn.execute(
+                    "SELECT day, signups FROM user_signups_daily WHERE day >= date('now', ?) ORDER BY day",
+                    (f"-{days - 1} days",)
+                )
+            signups_per_day = {r['day']: r['signups'] for r in daily.fetchall()}
+            if hours is None:
+                hourly = conn.execute("SELECT hour, signups FROM user_signups_hourly ORDER BY hour")
+            else:
+                hourly = conn.execute(
+                    "SELECT hour, signups FROM user_signups_hourly "
+                    "WHERE hour >= strftime('%Y-%m-%d %H:00', 'now', ?) ORDER BY hour",
+                    (f"-{hours - 1} hours",)
+                )
+            signups_per_hour = {r['hour']: r['signups'] for r in hourly.fetchall()}
+            top_domains = conn.execute(
+                "SELECT domain, users FROM user_email_domains ORDER BY users DESC, domain LIMIT ?",
+                (-1 if domains is None else domains,)
+            )
+            email_domains = {r['domain']: r['users'] for r in top_domains.fetchall()}
+            total_users = row['total_users'] if row else 0
             
-            if row and bcrypt.check_password_hash(row['password_hash'], password):
-                return {
-                    'id': row['id'],
-                    'name': row['name'],
-                    'email': row['email']
-                }
-            return None
\ No newline at end of file
+            return {
+                'total_users': total_users,
+                'signups_per_day': signups_per_day,
+                'signups_per_hour': signups_per_hour,
+                'email_domains': email_domains,
+                'email_domains_other': total_users - sum(email_domains.values())
+            }
+    
+    def count_email_domains(self, domains: List[str]) -> Dict[str, int]:
+        """Get the number of users of each of the given email domains held here"""
+        counts = {}
+        with self._get_connection() as conn:
+            # Stay under SQLite's bound parameter limit
+            for start in range(0, len(domains), 500):
+                chunk = domains[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT domain, users FROM user_email_domains WHERE domain IN ({','.join('?' * len(chunk))})",
+                    chunk
+                )
+                counts.update((r['domain'], r['users']) for r in rows.fetchall())
+        return counts
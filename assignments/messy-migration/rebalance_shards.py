@@ -0,0 +1,87 @@
+from models.user import User
+from models.sharded_user import ShardedUser
+from typing import List
+import argparse
+import logging
+import os
+import sqlite3
+
+def rebalance_shards(source_paths: List[str], target_paths: List[str], batch_size: int = 1000) -> int:
+    """Copy every user from the source databases onto a new set of shards
+    
+    Sources may be a single unsharded database or an existing shard set.
+    Rows keep their IDs, password hashes and signup times, the email index is
+    rebuilt and the ID allocator is moved past the highest ID copied. The
+    target files must be new; sources are left untouched so the switch-over is
+    just pointing DATABASE_SHARDS at the targets.
+    """
+    overlap = {os.path.abspath(p) for p in source_paths} & {os.path.abspath(p) for p in target_paths}
+    if overlap:
+        raise ValueError(f"Target shards must not overlap the sources: {', '.join(sorted(overlap))}")
+    
+    for path in target_paths:
+        with User(path)._get_connection() as conn:
+            if conn.execute("SELECT 1 FROM users UNION ALL SELECT 1 FROM email_index LIMIT 1").fetchone():
+                raise ValueError(f"Target shard is not empty: {path}")
+    
+    target = ShardedUser(target_paths)
+    copied = 0
+    max_id = 0
+    
+    for source_path in source_paths:
+        source = sqlite3.connect(source_path)
+        try:
+            cursor = source.execute(
+                "SELECT id, name, email, password_hash, created_at FROM users ORDER BY id"
+            )
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                
+                users_by_shard = {}
+                emails_by_shard = {}
+                for row in rows:
+                    users_by_shard.setdefault(target.shard_index_for_id(row[0]), []).append(row)
+                    emails_by_shard.setdefault(target.shard_index_for_email(row[2]), []).append((row[2], row[0]))
+                
+                for index, shard_rows in users_by_shard.items():
+                    with target.shards[index]._get_connection() as conn:
+                        conn.executemany(
+                            "INSERT INTO users (id, name, email, password_hash, created_at) VALUES (?, ?, ?, ?, ?)",
+                            shard_rows
+                        )
+                for index, entries in emails_by_shard.items():
+                    with target.shards[index]._get_connection() as conn:
+                        conn.executemany(
+                            "INSERT INTO email_index (email, user_id) VALUES (?, ?)",
+                            entries
+                        )
+                
+                copied += len(rows)
+                max_id = max(max_id, rows[-1][0])
+        finally:
+            source.close()
+    
+    with target.shards[0]._get_connection() as conn:
+        conn.execute(
+            "UPDATE id_allocator SET next_id = MAX(next_id, ?) WHERE id = 0",
+            (max_id + 1,)
+        )
+    
+    return copied
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Redistribute users onto a new set of shard files")
+    parser.add_argument('--source', nargs='+', required=True, help="Current database or shard files")
+    parser.add_argument('--target', nargs='+', required=True, help="New shard files to create")
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+    
+    try:
+        count = rebalance_shards(args.source, args.target, args.batch_size)
+        print(f"Copied {count} users onto {len(args.target)} shards")
+        print(f"Set DATABASE_SHARDS={','.join(args.target)} to use them")
+    except Exception as e:
+        logging.error(f"Error rebalancing shards: {str(e)}")
+        print(f"Error rebalancing shards: {str(e)}")
@@ -0,0 +1,47 @@
+from flask import Blueprint, request, current_app
+from flask_limiter import Limiter
+from models.query_profiler import QueryProfiler
+from utils.responses import success_response, error_response
+import hmac
+import logging
+
+logger = logging.getLogger(__name__)
+
+def create_admin_routes(profiler: QueryProfiler, limiter: Limiter) -> Blueprint:
+    """Create admin routes blueprint"""
+    bp = Blueprint('admin', __name__, url_prefix='/admin')
+    
+    @bp.before_request
+    def require_admin_token():
+        """Only allow requests carrying the configured X-Admin-Token"""
+        expected = current_app.config.get('ADMIN_TOKEN')
+        if not expected:
+            return error_response("Admin endpoints are disabled", status_code=403)
+        
+        token = request.headers.get('X-Admin-Token', '')
+        if not hmac.compare_digest(token.encode('utf-8'), expected.encode('utf-8')):
+            logger.warning(f"Rejected admin request to {request.path}")
+            return error_response("Invalid admin token", status_code=401)
+    
+    @bp.route('/query-stats', methods=['GET'])
+    @limiter.limit("30 per minute")
+    def get_query_stats():
+        """Get per-statement query timings and plans"""
+        try:
+            return success_response(data={
+                'slow_threshold_ms': profiler.slow_threshold_ms,
+                'statements': profiler.report()
+            })
+        except Exception as e:
+            logger.error(f"Error fetching query stats: {str(e)}")
+            return error_response("Internal server error", status_code=500)
+    
+    @bp.route('/query-stats', methods=['DELETE'])
+    @limiter.limit("10 per minute")
+    def reset_query_stats():
+        """Clear collected query timings and plans"""
+        profiler.reset()
+        logger.info("Query stats reset")
+        return success_response(message="Query stats reset")
+    
+    return bp
\ No newline at end of file
@@ -0,0 +1,52 @@
+from typing import Any, Dict, Optional, Tuple
+from models.query_profiler import QueryProfiler
+from utils.asgi import AsgiRequest, Router
+from utils.responses import success_envelope, error_envelope
+import hmac
+import logging
+
+logger = logging.getLogger(__name__)
+
+def create_async_admin_routes(profiler: QueryProfiler, admin_token: Optional[str]) -> Router:
+    """Create admin routes for the ASGI app, mirroring create_admin_routes"""
+    router = Router()
+    
+    def check_admin_token(request: AsgiRequest) -> Optional[Tuple[Dict[str, Any], int]]:
+        """Get an error response unless the request carries the configured X-Admin-Token"""
+        if not admin_token:
+            return error_envelope("Admin endpoints are disabled"), 403
+        
+        token = request.headers.get('x-admin-token', '')
+        if not hmac.compare_digest(token.encode('utf-8'), admin_token.encode('utf-8')):
+            logger.warning(f"Rejected admin request to {request.path}")
+            return error_envelope("Invalid admin token"), 401
+        return None
+    
+    @router.route('/admin/query-stats', methods=['GET'], limit="30 per minute")
+    async def get_query_stats(request: AsgiRequest):
+        """Get per-statement query timings and plans"""
+        rejected = check_admin_token(request)
+        if rejected:
+            return rejected
+        
+        try:
+            return success_envelope(data={
+                'slow_threshold_ms': profiler.slow_threshold_ms,
+                'statements': profiler.report()
+            }), 200
+        except Exception as e:
+            logger.error(f"Error fetching query stats: {str(e)}")
+            return error_envelope("Internal server error"), 500
+    
+    @router.route('/admin/query-stats', methods=['DELETE'], limit="10 per minute")
+    async def reset_query_stats(request: AsgiRequest):
+        """Clear collected query timings and plans"""
+        rejected = check_admin_token(request)
+        if rejected:
+            return rejected
+        
+        profiler.reset()
+        logger.info("Query stats reset")
+        return success_envelope(message="Query stats reset"), 200
+    
+    return router
@@ -0,0 +1,208 @@
+from models.async_user import AsyncUser
+from models.user import STATS_DAYS, STATS_HOURS, STATS_DOMAINS, MAX_STATS_DAYS, MAX_STATS_HOURS, MAX_STATS_DOMAINS
+from utils.asgi import AsgiRequest, Router, StreamedBody
+from utils.validation import validate_user_data, validate_user_id, validate_window
+from utils.responses import success_envelope, error_envelope, stream_success_envelope
+import logging
+
+logger = logging.getLogger(__name__)
+
+def create_async_user_routes(user_model: AsyncUser) -> Router:
+    """Create user routes for the ASGI app, mirroring create_user_routes"""
+    router = Router()
+    
+    @router.route('/', methods=['GET'])
+    async def home(request: AsgiRequest):
+        """Health check endpoint"""
+        return success_envelope(message="User Management System"), 200
+    
+    @router.route('/users', methods=['GET'], limit="50 per minute")
+    async def get_all_users(request: AsgiRequest):
+        """Get all users"""
+        # Only the first page is read here; later pages are read and serialized
+        # on the DB pool while streaming, so the event loop never holds the list
+        try:
+            users = await user_model.iter_all_users()
+            return StreamedBody(stream_success_envelope(users), user_model.iterate), 200
+        except Exception as e:
+            logger.error(f"Error fetching users: {str(e)}")
+            return error_envelope("Internal server error"), 500
+    
+    @router.route('/users/stats', methods=['GET'], limit="30 per minute")
+    async def get_user_stats(request: AsgiRequest):
+        """Get precomputed user statistics, ?days=, ?hours= and ?domains= widen what is returned"""
+        try:
+            days = validate_window(request.args.get('days'), STATS_DAYS, MAX_STATS_DAYS)
+            if days is None:
+                return error_envelope(f"days must be between 1 and {MAX_STATS_DAYS}"), 400
+            
+            hours = validate_window(request.args.get('hours'), STATS_HOURS, MAX_STATS_HOURS)
+            if hours is None:
+                return error_envelope(f"hours must be between 1 and {MAX_STATS_HOURS}"), 400
+            
+            domains = validate_window(request.args.get('domains'), STATS_DOMAINS, MAX_STATS_DOMAINS)
+            if domains is None:
+                return error_envelope(f"domains must be between 1 and {MAX_STATS_DOMAINS}"), 400
+            
+            stats = await user_model.get_stats(days=days, hours=hours, domains=domains)
+            return success_envelope(data=stats), 200
+        except Exception as e:
+            logger.error(f"Error fetching user stats: {str(e)}")
+            return error_envelope("Internal server error"), 500
+    
+    @router.route('/user/<user_id>', methods=['GET'], limit="100 per minute")
+    async def get_user(request: AsgiRequest, user_id: str):
+        """Get specific user by ID"""
+        try:
+            uid = validate_user_id(user_id)
+            if uid is None:
+                return error_envelope("Invalid user ID"), 400
+            
+            user = await user_model.get_user_by_id(uid)
+            if user:
+                return success_envelope(data=user), 200
+            else:
+                return error_envelope("User not found"), 404
+        except Exception as e:
+            logger.error(f"Error fetching user {user_id}: {str(e)}")
+            return error_envelope("Internal server error"), 500
+    
+    @router.route('/users', methods=['POST'], limit="10 per minute")
+    async def create_user(request: AsgiRequest):
+        """Create a new user"""
+        try:
+            data = request.get_json()
+            if not data:
+                return error_envelope("No JSON data provided"), 400
+            
+            # Validate required fields
+            required_fields = ['name', 'email', 'password']
+            missing_fields = [field for field in required_fields if field not in data]
+            if missing_fields:
+                return error_envelope(f"Missing required fields: {', '.join(missing_fields)}"), 400
+            
+            # Validate data
+            validation_errors = validate_user_data(data)
+            if validation_errors:
+                return error_envelope("Validation failed", errors=validation_errors), 422
+            
+            # Create user
+            user_id = await user_model.create_user(
+                name=data['name'].strip(),
+                email=data['email'].strip().lower(),
+                password=data['password']
+            )
+            
+            if user_id:
+                logger.info(f"User created successfully with ID: {user_id}")
+                return success_envelope(data={'id': user_id}, message="User created successfully"), 201
+            else:
+                return error_envelope("Email already exists"), 409
+        
+        except Exception as e:
+            logger.error(f"Error creating user: {str(e)}")
+            return error_envelope("Internal server error"), 500
+    
+    @router.route('/user/<user_id>', methods=['PUT'], limit="20 per minute")
+    async def update_user(request: AsgiRequest, user_id: str):
+        """Update user information"""
+        try:
+            uid = validate_user_id(user_id)
+            if uid is None:
+                return error_envelope("Invalid user ID"), 400
+            
+            data = request.get_json()
+            if not data:
+                return error_envelope("No JSON data provided"), 400
+            
+            # Validate data
+            validation_errors = validate_user_data(data)
+            if validation_errors:
+                return error_envelope("Validation failed", errors=validation_errors), 422
+            
+            # Update user
+            name = data.get('name', '').strip() if data.get('name') else None
+            email = data.get('email', '').strip().lower() if data.get('email') else None
+            
+            success = await user_model.update_user(uid, name=name, email=email)
+            
+            if success:
+                logger.info(f"User {uid} updated successfully")
+                return success_envelope(message="User updated successfully"), 200
+            else:
+                return error_envelope("User not found or email already exists"), 404
+        
+        except Exception as e:
+            logger.error(f"Error updating user {user_id}: {str(e)}")
+            return error_envelope("Internal server error"), 500
+    
+    @router.route('/user/<user_id>', methods=['DELETE'], limit="10 per minute")
+    async def delete_user(request: AsgiRequest, user_id: str):
+        """Delete user by ID"""
+        try:
+            uid = validate_user_id(user_id)
+            if uid is None:
+                return error_envelope("Invalid user ID"), 400
+            
+            success = await user_model.delete_user(uid)
+            
+            if success:
+                logger.info(f"User {uid} deleted successfully")
+                return success_envelope(message="User deleted successfully"), 200
+            else:
+                return error_envelope("User not found"), 404
+        
+        except Exception as e:
+            logger.error(f"Error deleting user {user_id}: {str(e)}")
+            return error_envelope("Internal server error"), 500
+    
+    @router.route('/search', methods=['GET'], limit="30 per minute")
+    async def search_users(request: AsgiRequest):
+        """Search users by name"""
+        try:
+            name = request.args.get('name', '').strip()
+            
+            if not name:
+                return error_envelope("Please provide a name to search"), 400
+            
+            if len(name) < 2:
+                return error_envelope("Search term must be at least 2 characters"), 400
+            
+            users = await user_model.search_users_by_name(name)
+            return success_envelope(data=users), 200
+        
+        except Exception as e:
+            logger.error(f"Error searching users: {str(e)}")
+            return error_envelope("Internal server error"), 500
+    
+    @router.route('/login', methods=['POST'], limit="5 per minute")
+    async def login(request: AsgiRequest):
+        """User login endpoint"""
+        try:
+            data = request.get_json()
+            if not data:
+                return error_envelope("No JSON data provided"), 400
+            
+            email = data.get('email', '').strip().lower()
+            password = data.get('password', '')
+            
+            if not email or not password:
+                return error_envelope("Email and password are required"), 400
+            
+            user = await user_model.authenticate_user(email, password)
+            
+            if user:
+                logger.info(f"User {user['id']} logged in successfully")
+                return success_envelope(
+                    data={'user_id': user['id'], 'name': user['name']},
+                    message="Login successful"
+                ), 200
+            else:
+                logger.warning(f"Failed login attempt for email: {email}")
+                return error_envelope("Invalid email or password"), 401
+        
+        except Exception as e:
+            logger.error(f"Error during login: {str(e)}")
+            return error_envelope("Internal server error"), 500
+    
+    return router
@@ -1,9 +1,9 @@
 from flask import Blueprint, request
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
-from models.user import User
-from utils.validation import validate_user_data, validate_user_id
-from utils.responses import success_response, error_response, validation_error_response
+from models.user import User, STATS_DAYS, STATS_HOURS, STATS_DOMAINS, MAX_STATS_DAYS, MAX_STATS_HOURS, MAX_STATS_DOMAINS
+from utils.validation import validate_user_data, validate_user_id, validate_window
+from utils.responses import success_response, error_response, validation_error_response, streamed_success_response
 import logging
 
 # Configure logging
@@ -23,13 +23,38 @@ def create_user_routes(user_model: User, limiter: Limiter) -> Blueprint:
     @limiter.limit("50 per minute")
     def get_all_users():
         """Get all users"""
+        # Only the first page is read here; errors on later pages happen while
+        # streaming and are logged by streamed_success_response
         try:
-            users = user_model.get_all_users()
-            return success_response(data=users)
+            users = user_model.iter_all_users()
+            return streamed_success_response(users)
         except Exception as e:
             logger.error(f"Error fetching users: {str(e)}")
             return error_response("Internal server error", status_code=500)
     
+    @bp.route('/users/stats', methods=['GET'])
+    @limiter.limit("30 per minute")
+    def get_user_stats():
+        """Get precomputed user statistics, ?days=, ?hours= and ?domains= widen what is returned"""
+        try:
+            days = validate_window(request.args.get('days'), STATS_DAYS, MAX_STATS_DAYS)
+            if days is None:
+                return error_response(f"days must be between 1 and {MAX_STATS_DAYS}", status_code=400)
+            
+            hours = validate_window(request.args.get('hours'), STATS_HOURS, MAX_STATS_HOURS)
+            if hours is None:
+                return error_response(f"hours must be between 1 and {MAX_STATS_HOURS}", status_code=400)
+            
+            domains = validate_window(request.args.get('domains'), STATS_DOMAINS, MAX_STATS_DOMAINS)
+            if domains is None:
+                return error_response(f"domains must be between 1 and {MAX_STATS_DOMAINS}", status_code=400)
+            
+            stats = user_model.get_stats(days=days, hours=hours, domains=domains)
+            return success_response(data=stats)
+        except Exception as e:
+            logger.error(f"Error fetching user stats: {str(e)}")
+            return error_response("Internal server error", status_code=500)
+    
     @bp.route('/user/<user_id>', methods=['GET'])
     @limiter.limit("100 per minute")
     def get_user(user_id):
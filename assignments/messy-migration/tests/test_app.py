@@ -0,0 +1,26 @@
+import pytest
+import tempfile
+import os
+import gc
+from config import Config
+from app import create_app
+
+@pytest.fixture
+def temp_db():
+    """Create a temporary database for testing"""
+    fd, path = tempfile.mkstemp()
+    os.close(fd)
+    yield path
+    os.unlink(path)
+
+def test_create_app_with_rate_limiting_disabled(temp_db, monkeypatch):
+    """Test limited routes still work once a disabled limiter could be collected"""
+    monkeypatch.setattr(Config, 'DATABASE_PATH', temp_db)
+    monkeypatch.setattr(Config, 'DATABASE_SHARDS', [])
+    monkeypatch.setattr(Config, 'RATELIMIT_ENABLED', False)
+    app = create_app()
+    gc.collect()
+    
+    client = app.test_client()
+    assert client.get('/users/stats').status_code == 200
+    assert client.get('/users').status_code == 200
@@ -0,0 +1,354 @@
+import pytest
+import asyncio
+import tempfile
+import json
+import gzip
+import os
+import multiprocessing
+from models.user import User
+from models.async_user import AsyncUser
+from models.query_profiler import QueryProfiler
+from routes.async_user_routes import create_async_user_routes
+from routes.async_admin_routes import create_async_admin_routes
+from utils.asgi import AsgiApp, RateLimiter
+
+@pytest.fixture
+def temp_db():
+    """Create a temporary database for testing"""
+    fd, path = tempfile.mkstemp()
+    os.close(fd)
+    yield path
+    os.unlink(path)
+
+@pytest.fixture
+def asgi_app(temp_db):
+    """Create an ASGI app over a temporary database"""
+    user_model = AsyncUser(User(temp_db), db_workers=4, hash_workers=2)
+    app = AsgiApp(create_async_user_routes(user_model), RateLimiter("100 per hour"))
+    yield app
+    user_model.close()
+
+async def raw_call(app, method, path, body=None, query=b'', headers=()):
+    """Send one request through the ASGI app, returning (response start message, body bytes)"""
+    payload = json.dumps(body).encode() if body is not None else b''
+    messages = [{'type': 'http.request', 'body': payload, 'more_body': False}]
+    sent = []
+    
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.Event().wait()  # The client stays connected
+    
+    async def send(message):
+        sent.append(message)
+    
+    scope = {
+        'type': 'http', 'method': method, 'path': path, 'query_string': query,
+        'headers': [(b'content-type', b'application/json'), *headers], 'client': ('127.0.0.1', 1234)
+    }
+    await app(scope, receive, send)
+    return sent[0], b''.join(message['body'] for message in sent[1:])
+
+async def call(app, method, path, body=None, query=b'', headers=()):
+    """Send one request through the ASGI app, returning (status, json body)"""
+    start, payload = await raw_call(app, method, path, body, query, headers)
+    return start['status'], json.loads(payload)
+
+def test_user_lifecycle(asgi_app):
+    """Test the ASGI routes return the same envelopes as the Flask app"""
+    async def scenario():
+        status, body = await call(asgi_app, 'POST', '/users',
+                                  {'name': 'Test User', 'email': 'Test@Example.com', 'password': 'password123'})
+        assert status == 201
+        assert body == {'success': True, 'message': "User created successfully", 'data': {'id': 1}}
+        
+        status, body = await call(asgi_app, 'GET', '/user/1')
+        assert status == 200
+        assert body['data']['email'] == "test@example.com"
+        
+        status, body = await call(asgi_app, 'POST', '/login', {'email': 'test@example.com', 'password': 'password123'})
+        assert status == 200
+        assert body['data'] == {'user_id': 1, 'name': "Test User"}
+        
+        status, body = await call(asgi_app, 'POST', '/login', {'email': 'test@example.com', 'password': 'wrong'})
+        assert status == 401
+        assert body == {'success': False, 'message': "Invalid email or password"}
+        
+        status, body = await call(asgi_app, 'GET', '/search', query=b'name=Test')
+        assert status == 200
+        assert len(body['data']) == 1
+        
+        status, body = await call(asgi_app, 'PUT', '/user/1', {'name': 'Renamed'})
+        assert status == 200
+        
+        status, body = await call(asgi_app, 'GET', '/users/stats')
+        assert body['data']['total_users'] == 1
+        
+        status, body = await call(asgi_app, 'DELETE', '/user/1')
+        assert status == 200
+        
+        status, body = await call(asgi_app, 'GET', '/users')
+        assert body == {'success': True, 'data': []}
+    
+    asyncio.run(scenario())
+
+def test_errors(asgi_app):
+    """Test validation, routing and duplicate errors"""
+    async def scenario():
+        status, body = await call(asgi_app, 'POST', '/users', {'name': '', 'email': 'bad', 'password': '1'})
+        assert status == 422
+        assert set(body['errors']) == {'name', 'email', 'password'}
+        
+        status, body = await call(asgi_app, 'POST', '/users', {'name': 'No Email'})
+        assert status == 400
+        
+        user = {'name': 'Test User', 'email': 'test@example.com', 'password': 'password123'}
+        await call(asgi_app, 'POST', '/users', user)
+        status, body = await call(asgi_app, 'POST', '/users', user)
+        assert status == 409
+        
+        assert (await call(asgi_app, 'GET', '/user/abc'))[0] == 400
+        assert (await call(asgi_app, 'GET', '/user/999'))[0] == 404
+        assert (await call(asgi_app, 'GET', '/nowhere'))[0] == 404
+        assert (await call(asgi_app, 'PATCH', '/users'))[0] == 405
+    
+    asyncio.run(scenario())
+
+def test_users_streamed(temp_db):
+    """Test GET /users is sent in chunks read and serialized off the event loop"""
+    user_model = AsyncUser(User(temp_db), db_workers=1, hash_workers=1)
+    app = AsgiApp(create_async_user_routes(user_model), RateLimiter("100 per hour"))
+    with user_model.user_model._get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO users (name, email, password_hash) VALUES (?, ?, ?)",
+            ((f"User {i}", f"user{i}@example.com", "hash") for i in range(1200))
+        )
+    
+    async def scenario():
+        sent = []
+        messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+        
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            await asyncio.Event().wait()
+        
+        async def send(message):
+            sent.append(message)
+        
+        scope = {'type': 'http', 'method': 'GET', 'path': '/users', 'query_string': b'',
+                 'headers': [], 'client': ('127.0.0.1', 1234)}
+        await app(scope, receive, send)
+        return sent
+    
+    try:
+        sent = asyncio.run(scenario())
+    finally:
+        user_model.close()
+    
+    assert sent[0]['status'] == 200
+    assert len(sent) > 3
+    assert all(message['more_body'] for message in sent[1:-1])
+    assert not sent[-1].get('more_body', False)
+    body = json.loads(b''.join(message['body'] for message in sent[1:]))
+    assert body['success'] is True
+    assert [user['id'] for user in body['data']] == list(range(1, 1201))
+
+def test_users_stream_stops_on_disconnect(temp_db):
+    """Test a client dropping GET /users stops the stream before later pages are read"""
+    user_model = AsyncUser(User(temp_db), db_workers=1, hash_workers=1)
+    app = AsgiApp(create_async_user_routes(user_model), RateLimiter("100 per hour"))
+    with user_model.user_model._get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO users (name, email, password_hash) VALUES (?, ?, ?)",
+            ((f"User {i}", f"user{i}@example.com", "hash") for i in range(1200))
+        )
+    
+    pages_read = []
+    get_users_page = user_model.user_model._get_users_page
+    def counting_get_users_page(after_id, limit):
+        pages_read.append(after_id)
+        return get_users_page(after_id, limit)
+    user_model.user_model._get_users_page = counting_get_users_page
+    
+    async def scenario():
+        sent = []
+        messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+        gone = asyncio.Event()
+        
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            await gone.wait()
+            return {'type': 'http.disconnect'}
+        
+        async def send(message):
+            sent.append(message)
+            if message.get('more_body'):
+                gone.set()  # The client drops after the first chunk
+                await asyncio.sleep(0.05)
+        
+        scope = {'type': 'http', 'method': 'GET', 'path': '/users', 'query_string': b'',
+                 'headers': [], 'client': ('127.0.0.1', 1234)}
+        await app(scope, receive, send)
+        return sent
+    
+    try:
+        sent = asyncio.run(scenario())
+    finally:
+        user_model.close()
+    
+    assert sent[0]['status'] == 200
+    assert all(message.get('more_body') for message in sent[1:])  # Never completed
+    assert pages_read == [0]  # 1200 users in pages of 500 would take three reads
+
+def test_gzip_negotiated(temp_db):
+    """Test responses are gzipped for clients accepting it once they reach the minimum size"""
+    user_model = AsyncUser(User(temp_db), db_workers=1, hash_workers=1)
+    app = AsgiApp(create_async_user_routes(user_model), RateLimiter("100 per hour"), compression_min_size=500)
+    with user_model.user_model._get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO users (name, email, password_hash) VALUES (?, ?, ?)",
+            ((f"User {i}", f"user{i}@example.com", "hash") for i in range(1200))
+        )
+    accept = [(b'accept-encoding', b'gzip, deflate')]
+    
+    async def scenario():
+        # Streamed list
+        start, payload = await raw_call(app, 'GET', '/users', headers=accept)
+        headers = dict(start['headers'])
+        assert headers[b'content-encoding'] == b'gzip'
+        assert headers[b'vary'] == b'Accept-Encoding'
+        assert len(json.loads(gzip.decompress(payload))['data']) == 1200
+        
+        # Buffered body
+        start, payload = await raw_call(app, 'GET', '/search', query=b'name=User', headers=accept)
+        assert dict(start['headers'])[b'content-encoding'] == b'gzip'
+        assert len(json.loads(gzip.decompress(payload))['data']) == 1200
+        
+        # Small bodies and clients without gzip stay uncompressed
+        start, payload = await raw_call(app, 'GET', '/user/1', headers=accept)
+        assert b'content-encoding' not in dict(start['headers'])
+        start, payload = await raw_call(app, 'GET', '/users')
+        assert b'content-encoding' not in dict(start['headers'])
+        assert len(json.loads(payload)['data']) == 1200
+    
+    try:
+        asyncio.run(scenario())
+    finally:
+        user_model.close()
+    
+    # A streamed body that ends below the minimum is sent whole
+    with user_model.user_model._get_connection() as conn:
+        conn.execute("DELETE FROM users WHERE id > 1")
+    user_model = AsyncUser(user_model.user_model, db_workers=1, hash_workers=1)
+    app = AsgiApp(create_async_user_routes(user_model), RateLimiter("100 per hour"), compression_min_size=500)
+    try:
+        start, payload = asyncio.run(raw_call(app, 'GET', '/users', headers=accept))
+    finally:
+        user_model.close()
+    headers = dict(start['headers'])
+    assert b'content-encoding' not in headers
+    assert int(headers[b'content-length']) == len(payload)
+    assert len(json.loads(payload)['data']) == 1
+
+def test_head_answered_by_get_routes(asgi_app):
+    """Test HEAD on a GET route sends its headers without a body, as Flask does"""
+    async def scenario():
+        start, payload = await raw_call(asgi_app, 'HEAD', '/')
+        assert start['status'] == 200
+        assert payload == b''
+        
+        _, get_payload = await raw_call(asgi_app, 'GET', '/')
+        assert int(dict(start['headers'])[b'content-length']) == len(get_payload)
+        
+        start, payload = await raw_call(asgi_app, 'HEAD', '/users', headers=[(b'accept-encoding', b'gzip')])
+        assert start['status'] == 200
+        assert payload == b''
+        assert b'content-encoding' not in dict(start['headers'])
+        
+        assert (await raw_call(asgi_app, 'HEAD', '/user/999'))[0]['status'] == 404
+        assert (await raw_call(asgi_app, 'HEAD', '/login'))[0]['status'] == 405
+    
+    asyncio.run(scenario())
+
+def test_rate_limit(asgi_app):
+    """Test per-route limits are enforced"""
+    async def scenario():
+        statuses = [
+            (await call(asgi_app, 'POST', '/login', {'email': 'a@example.com', 'password': 'x'}))[0]
+            for _ in range(6)
+        ]
+        assert statuses == [401] * 5 + [429]
+    
+    asyncio.run(scenario())
+
+def test_rate_limit_before_body(asgi_app):
+    """Test requests over the limit are refused without reading their body"""
+    async def scenario():
+        for _ in range(5):
+            await call(asgi_app, 'POST', '/login', {'email': 'a@example.com', 'password': 'x'})
+        
+        received = []
+        sent = []
+        
+        async def receive():
+            received.append(True)
+            return {'type': 'http.request', 'body': b'x' * 65536, 'more_body': True}
+        
+        async def send(message):
+            sent.append(message)
+        
+        scope = {'type': 'http', 'method': 'POST', 'path': '/login', 'query_string': b'',
+                 'headers': [], 'client': ('127.0.0.1', 1234)}
+        await asgi_app(scope, receive, send)
+        assert sent[0]['status'] == 429
+        assert received == []
+    
+    asyncio.run(scenario())
+
+def test_concurrent_requests(asgi_app):
+    """Test many in-flight requests share the bounded pools"""
+    async def scenario():
+        await call(asgi_app, 'POST', '/users', {'name': 'Test User', 'email': 'test@example.com', 'password': 'password123'})
+        results = await asyncio.gather(*(call(asgi_app, 'GET', '/user/1') for _ in range(50)))
+        assert all(status == 200 for status, _ in results)
+    
+    asyncio.run(scenario())
+
+def test_admin_query_stats(temp_db):
+    """Test the ASGI app reports query stats behind the admin token"""
+    profiler = QueryProfiler()
+    user_model = AsyncUser(User(temp_db, profiler=profiler), db_workers=1, hash_workers=1)
+    router = create_async_user_routes(user_model)
+    router.include(create_async_admin_routes(profiler, 'token'))
+    app = AsgiApp(router, RateLimiter("100 per hour"))
+    
+    async def scenario():
+        await call(app, 'GET', '/users')
+        assert (await call(app, 'GET', '/admin/query-stats'))[0] == 401
+        assert (await call(app, 'GET', '/admin/query-stats', headers=[(b'x-admin-token', b'wrong')]))[0] == 401
+        
+        status, body = await call(app, 'GET', '/admin/query-stats', headers=[(b'x-admin-token', b'token')])
+        assert status == 200
+        assert body['data']['statements']
+        
+        status, body = await call(app, 'DELETE', '/admin/query-stats', headers=[(b'x-admin-token', b'token')])
+        assert status == 200
+        assert profiler.report() == []
+    
+    try:
+        asyncio.run(scenario())
+    finally:
+        user_model.close()
+
+def test_hash_workers_spawned_without_forkserver(temp_db, monkeypatch):
+    """Test platforms without forkserver (Windows) fall back to spawned hash workers"""
+    monkeypatch.setattr(multiprocessing, 'get_all_start_methods', lambda: ['spawn'])
+    user_model = AsyncUser(User(temp_db), db_workers=1, hash_workers=1)
+    try:
+        assert user_model._hash_executor._mp_context.get_start_method() == 'spawn'
+        user_id = asyncio.run(user_model.create_user("Test User", "test@example.com", "password123"))
+        assert asyncio.run(user_model.authenticate_user("test@example.com", "password123"))['id'] == user_id
+    finally:
+        user_model.close()
@@ -0,0 +1,90 @@
+import pytest
+import gzip
+import json
+from flask import Flask
+from utils.compression import init_compression, gzip_stream, gzip_accepted
+from utils.responses import success_response, streamed_success_response
+
+def make_users(count):
+    """Build a list of user dicts like the API returns"""
+    return [
+        {'id': i, 'name': f"User {i}", 'email': f"user{i}@example.com", 'created_at': "2024-01-01 00:00:00"}
+        for i in range(count)
+    ]
+
+@pytest.fixture
+def client():
+    """Create a test client for an app with compression enabled"""
+    app = Flask(__name__)
+    app.config['COMPRESSION_MIN_SIZE'] = 500
+    init_compression(app)
+    
+    @app.route('/small')
+    def small():
+        return success_response(data=make_users(1))
+    
+    @app.route('/large')
+    def large():
+        return success_response(data=make_users(100))
+    
+    @app.route('/stream/<int:count>')
+    def stream(count):
+        return streamed_success_response(iter(make_users(count)), batch_size=7)
+    
+    return app.test_client()
+
+def test_gzip_stream_roundtrip():
+    """Test incremental compression produces a valid gzip body"""
+    chunks = [f"chunk {i} ".encode() for i in range(1000)]
+    assert gzip.decompress(b''.join(gzip_stream(chunks, level=1))) == b''.join(chunks)
+
+def test_large_response_compressed(client):
+    """Test a buffered body over the threshold is gzipped"""
+    response = client.get('/large', headers={'Accept-Encoding': 'gzip, deflate'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert int(response.headers['Content-Length']) == len(response.data)
+    assert json.loads(gzip.decompress(response.data))['data'] == make_users(100)
+
+def test_small_response_not_compressed(client):
+    """Test a body under the threshold is sent as is"""
+    response = client.get('/small', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_json()['data'] == make_users(1)
+
+def test_compression_negotiated(client):
+    """Test gzip is only used when the client accepts it"""
+    response = client.get('/large')
+    assert 'Content-Encoding' not in response.headers
+    
+    response = client.get('/large', headers={'Accept-Encoding': 'gzip;q=0, identity'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_json()['data'] == make_users(100)
+
+def test_streamed_response_compressed(client):
+    """Test a streamed body is gzipped without a Content-Length"""
+    response = client.get('/stream/100', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    assert json.loads(gzip.decompress(response.data)) == {'success': True, 'data': make_users(100)}
+
+def test_small_streamed_response_not_compressed(client):
+    """Test a streamed body that stays under the threshold is sent as is"""
+    response = client.get('/stream/1', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_json() == {'success': True, 'data': make_users(1)}
+
+def test_streamed_success_response_empty(client):
+    """Test streaming an empty list gives a valid envelope"""
+    response = client.get('/stream/0')
+    assert response.get_json() == {'success': True, 'data': []}
+
+def test_gzip_accepted():
+    """Test Accept-Encoding parsing, including q-values and wildcards"""
+    assert gzip_accepted("gzip, deflate, br") is True
+    assert gzip_accepted("br;q=1.0, GZIP;q=0.5") is True
+    assert gzip_accepted("gzip;q=0") is False
+    assert gzip_accepted("*") is True
+    assert gzip_accepted("*;q=1, gzip;q=0") is False
+    assert gzip_accepted("deflate") is False
+    assert gzip_accepted("") is False
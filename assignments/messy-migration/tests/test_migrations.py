@@ -0,0 +1,78 @@
+import pytest
+import tempfile
+import os
+import sqlite3
+from models.migrations import migrate, get_schema_version, SCHEMA_VERSION, MIGRATIONS
+from models.user import User
+
+@pytest.fixture
+def temp_db():
+    """Create a temporary database for testing"""
+    fd, path = tempfile.mkstemp()
+    os.close(fd)
+    yield path
+    os.unlink(path)
+
+def test_migrate_fresh_database(temp_db):
+    """Test every migration is applied in order to an empty database"""
+    applied = migrate(temp_db)
+    assert applied == [version for version, _, _ in MIGRATIONS]
+    
+    with sqlite3.connect(temp_db) as conn:
+        assert get_schema_version(conn) == SCHEMA_VERSION
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {'idx_users_name', 'idx_users_created_at'} <= indexes
+
+def test_migrate_is_noop_when_current(temp_db):
+    """Test a current database is left alone without running DDL"""
+    migrate(temp_db)
+    with sqlite3.connect(temp_db) as conn:
+        schema_before = conn.execute("SELECT sql FROM sqlite_master ORDER BY name").fetchall()
+    
+    assert migrate(temp_db) == []
+    assert User(temp_db).get_stats()['total_users'] == 0
+    
+    with sqlite3.connect(temp_db) as conn:
+        assert conn.execute("SELECT sql FROM sqlite_master ORDER BY name").fetchall() == schema_before
+
+def test_migrate_unversioned_database(temp_db):
+    """Test a database created before versioning upgrades and keeps its users"""
+    with sqlite3.connect(temp_db) as conn:
+        conn.execute('''
+            CREATE TABLE users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                email TEXT UNIQUE NOT NULL,
+                password_hash TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.execute(
+            "INSERT INTO users (name, email, password_hash) VALUES (?, ?, ?)",
+            ("Old User", "old@example.com", "x")
+        )
+    
+    assert migrate(temp_db) == [version for version, _, _ in MIGRATIONS]
+    
+    user_model = User(temp_db)
+    assert user_model.get_all_users()[0]['email'] == "old@example.com"
+    assert user_model.get_stats()['total_users'] == 1
+
+def test_migrate_applies_only_pending(temp_db):
+    """Test only migrations newer than the recorded version run"""
+    with sqlite3.connect(temp_db) as conn:
+        for statement in MIGRATIONS[0][2]:
+            conn.execute(statement)
+        conn.execute("PRAGMA user_version = 1")
+    
+    assert migrate(temp_db) == [version for version, _, _ in MIGRATIONS[1:]]
+
+def test_migrate_refuses_newer_schema(temp_db):
+    """Test a database migrated by newer code is not used as if it were current"""
+    with sqlite3.connect(temp_db) as conn:
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION + 1}")
+    
+    with pytest.raises(ValueError, match="schema version"):
+        migrate(temp_db)
+    with pytest.raises(ValueError):
+        User(temp_db)
@@ -0,0 +1,144 @@
+import pytest
+import tempfile
+import os
+import logging
+import sqlite3
+from flask import Flask
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
+from models.query_profiler import QueryProfiler, redact_params
+from models.user import User
+from routes.admin_routes import create_admin_routes
+
+@pytest.fixture
+def temp_db():
+    """Create a temporary database for testing"""
+    fd, path = tempfile.mkstemp()
+    os.close(fd)
+    yield path
+    os.unlink(path)
+
+@pytest.fixture
+def profiler():
+    """Create a profiler that treats every query as slow"""
+    return QueryProfiler(slow_threshold_ms=0)
+
+def test_redact_params():
+    """Test password columns and bcrypt hashes are masked"""
+    bcrypt_hash = "$2b$12$" + "x" * 53
+    assert redact_params(
+        "INSERT INTO users (id, name, email, password_hash) VALUES (?, ?, ?, ?)",
+        (None, "Test User", "test@example.com", bcrypt_hash)
+    ) == (None, "Test User", "test@example.com", "***")
+    assert redact_params(
+        "UPDATE users SET password_hash = ? WHERE id = ?",
+        ("secret", 1)
+    ) == ("***", 1)
+    assert redact_params(
+        "SELECT id FROM users WHERE email = ?",
+        ("test@example.com",)
+    ) == ("test@example.com",)
+
+def test_statements_timed_and_explained(temp_db, profiler):
+    """Test each statement is aggregated and its plan captured once"""
+    user_model = User(temp_db, profiler=profiler)
+    user_id = user_model.create_user("Test User", "test@example.com", "password123")
+    user_model.get_user_by_id(user_id)
+    user_model.get_user_by_id(user_id)
+    user_model.search_users_by_name("Test")
+    
+    report = {stats['sql']: stats for stats in profiler.report()}
+    
+    by_id = report["SELECT id, name, email, created_at FROM users WHERE id = ?"]
+    assert by_id['calls'] == 2
+    assert by_id['full_scan'] is False
+    assert by_id['plan']
+    
+    search = report["SELECT id, name, email, created_at FROM users WHERE name LIKE ?"]
+    assert search['full_scan'] is True
+    assert search['index_scan'] is False
+
+def test_index_scans_flagged(temp_db, profiler):
+    """Test scans that read every row through an index are flagged as full scans"""
+    user_model = User(temp_db, profiler=profiler)
+    with user_model._get_connection() as conn:
+        conn.execute("SELECT id FROM users WHERE name LIKE ?", ("%Test%",)).fetchall()
+        conn.execute("SELECT COUNT(*) FROM users").fetchall()
+        conn.execute("SELECT 1").fetchall()
+    
+    report = {stats['sql']: stats for stats in profiler.report()}
+    for sql in ("SELECT id FROM users WHERE name LIKE ?", "SELECT COUNT(*) FROM users"):
+        assert report[sql]['full_scan'] is True
+        assert report[sql]['index_scan'] is True
+    assert report["SELECT 1"]['full_scan'] is False
+
+def test_slow_queries_logged_redacted(temp_db, profiler, caplog):
+    """Test slow statements are logged with password hashes masked"""
+    user_model = User(temp_db, profiler=profiler)
+    with caplog.at_level(logging.WARNING, logger='models.query_profiler'):
+        user_model.create_user("Test User", "test@example.com", "password123")
+    
+    messages = [record.getMessage() for record in caplog.records if 'Slow query' in record.getMessage()]
+    assert any('INSERT INTO users' in message for message in messages)
+    assert all('$2b$' not in message for message in messages)
+    assert any("'***'" in message for message in messages)
+
+def test_fetch_time_included(temp_db):
+    """Test a cheap execute whose rows take long to fetch is still caught as slow"""
+    User(temp_db)
+    conn = sqlite3.connect(temp_db)
+    conn.executemany(
+        "INSERT INTO users (name, email, password_hash) VALUES (?, ?, ?)",
+        ((f"User {i}", f"user{i}@example.com", "hash") for i in range(20000))
+    )
+    conn.commit()
+    conn.close()
+    
+    profiler = QueryProfiler(slow_threshold_ms=1)
+    User(temp_db, profiler=profiler).get_all_users()
+    
+    stats = {stats['sql']: stats for stats in profiler.report()}["SELECT id, name, email, created_at FROM users"]
+    assert stats['calls'] == 1
+    assert stats['slow_calls'] == 1
+
+def test_recorded_once_rows_consumed(temp_db, profiler):
+    """Test a statement is recorded when its cursor runs out of rows, not at execute"""
+    user_model = User(temp_db, profiler=profiler)
+    user_model.create_user("Test User", "test@example.com", "password123")
+    profiler.reset()
+    
+    conn = user_model._get_connection()
+    cursor = conn.execute("SELECT id FROM users")
+    assert profiler.report() == []
+    assert cursor.fetchone() is not None
+    assert profiler.report() == []
+    assert cursor.fetchone() is None
+    assert [stats['calls'] for stats in profiler.report()] == [1]
+    
+    cursor = conn.execute("SELECT id FROM users")
+    cursor.close()
+    assert [stats['calls'] for stats in profiler.report()] == [2]
+    conn.close()
+
+def test_admin_query_stats(temp_db, profiler):
+    """Test the admin report requires the configured token"""
+    app = Flask(__name__)
+    limiter = Limiter(key_func=get_remote_address, storage_uri="memory://")
+    limiter.init_app(app)
+    app.register_blueprint(create_admin_routes(profiler, limiter))
+    client = app.test_client()
+    
+    User(temp_db, profiler=profiler).get_all_users()
+    
+    assert client.get('/admin/query-stats').status_code == 403
+    
+    app.config['ADMIN_TOKEN'] = 'token'
+    assert client.get('/admin/query-stats', headers={'X-Admin-Token': 'wrong'}).status_code == 401
+    
+    response = client.get('/admin/query-stats', headers={'X-Admin-Token': 'token'})
+    assert response.status_code == 200
+    statements = response.get_json()['data']['statements']
+    assert statements[0]['sql'] == "SELECT id, name, email, created_at FROM users"
+    
+    assert client.delete('/admin/query-stats', headers={'X-Admin-Token': 'token'}).status_code == 200
+    assert profiler.report() == []
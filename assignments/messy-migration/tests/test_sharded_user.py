@@ -0,0 +1,236 @@
+import pytest
+import tempfile
+import shutil
+import os
+from concurrent.futures import ThreadPoolExecutor
+from models.user import User
+from models.sharded_user import ShardedUser
+from rebalance_shards import rebalance_shards
+
+@pytest.fixture
+def temp_dir():
+    """Create a temporary directory for shard files"""
+    path = tempfile.mkdtemp()
+    yield path
+    shutil.rmtree(path)
+
+@pytest.fixture
+def sharded_model(temp_dir):
+    """Create a ShardedUser instance over three temporary shards"""
+    paths = [os.path.join(temp_dir, f"shard{i}.db") for i in range(3)]
+    return ShardedUser(paths, id_block_size=10)
+
+def test_create_and_route_by_id(sharded_model):
+    """Test users are spread over shards by ID and found again"""
+    user_ids = [
+        sharded_model.create_user(f"User {i}", f"user{i}@example.com", "password123")
+        for i in range(6)
+    ]
+    assert len(set(user_ids)) == 6
+    
+    for user_id in user_ids:
+        assert sharded_model.shard_for_id(user_id).get_user_by_id(user_id) is not None
+        assert sharded_model.get_user_by_id(user_id)['id'] == user_id
+    
+    # Every shard received some users
+    assert all(shard.get_all_users() for shard in sharded_model.shards)
+
+def test_ids_unique_across_instances(temp_dir):
+    """Test ID blocks reserved by separate instances never overlap"""
+    paths = [os.path.join(temp_dir, f"shard{i}.db") for i in range(2)]
+    first = ShardedUser(paths, id_block_size=5)
+    second = ShardedUser(paths, id_block_size=5)
+    
+    ids = set()
+    for i in range(8):
+        ids.add(first.create_user(f"A {i}", f"a{i}@example.com", "password123"))
+        ids.add(second.create_user(f"B {i}", f"b{i}@example.com", "password123"))
+    assert len(ids) == 16
+
+def test_duplicate_email_across_shards(sharded_model):
+    """Test email uniqueness is enforced globally"""
+    assert sharded_model.create_user("User 1", "test@example.com", "password123") is not None
+    assert sharded_model.create_user("User 2", "test@example.com", "password456") is None
+
+def test_authenticate_routes_by_email(sharded_model):
+    """Test authentication looks the user up through the email index"""
+    sharded_model.create_user("Test User", "test@example.com", "password123")
+    
+    assert sharded_model.authenticate_user("test@example.com", "password123")['name'] == "Test User"
+    assert sharded_model.authenticate_user("test@example.com", "wrongpassword") is None
+    assert sharded_model.authenticate_user("wrong@example.com", "password123") is None
+
+def test_update_email_moves_index(sharded_model):
+    """Test changing an email releases the old one and claims the new one"""
+    user_id = sharded_model.create_user("User 1", "old@example.com", "password123")
+    other_id = sharded_model.create_user("User 2", "taken@example.com", "password123")
+    
+    assert sharded_model.update_user(user_id, email="taken@example.com") is False
+    assert sharded_model.update_user(user_id, email="new@example.com") is True
+    assert sharded_model.authenticate_user("new@example.com", "password123")['id'] == user_id
+    assert sharded_model.authenticate_user("old@example.com", "password123") is None
+    
+    # The old email is free again
+    assert sharded_model.create_user("User 3", "old@example.com", "password123") is not None
+    assert sharded_model.get_user_by_id(other_id)['email'] == "taken@example.com"
+
+def test_delete_releases_email(sharded_model):
+    """Test deleting a user frees the email"""
+    user_id = sharded_model.create_user("Test User", "test@example.com", "password123")
+    
+    assert sharded_model.delete_user(user_id) is True
+    assert sharded_model.get_user_by_id(user_id) is None
+    assert sharded_model.delete_user(user_id) is False
+    assert sharded_model.create_user("Test User", "test@example.com", "password123") is not None
+
+def test_scatter_gather(sharded_model):
+    """Test listing, searching and stats merge results from every shard"""
+    for i in range(5):
+        sharded_model.create_user(f"John {i}", f"john{i}@example.com", "password123")
+    sharded_model.create_user("Jane Smith", "jane@other.org", "password456")
+    
+    users = sharded_model.get_all_users()
+    assert len(users) == 6
+    assert [u['id'] for u in users] == sorted(u['id'] for u in users)
+    
+    assert list(sharded_model.iter_all_users(batch_size=2)) == users
+    
+    results = sharded_model.search_users_by_name("John")
+    assert len(results) == 5
+    
+    stats = sharded_model.get_stats()
+    assert stats['total_users'] == 6
+    assert stats['email_domains'] == {'example.com': 5, 'other.org': 1}
+
+def test_stats_top_domains_exact_across_shards(sharded_model):
+    """Test a domain outside one shard's top list is still counted from that shard"""
+    user_ids = {}
+    for i in range(9):
+        user_id = sharded_model._allocate_id()
+        user_ids.setdefault(sharded_model.shard_index_for_id(user_id), []).append(user_id)
+    
+    # Shard 0 favours a.com, shard 1 b.com; b.com also has one user on shard 0
+    layout = {0: ["a.com", "a.com", "b.com"], 1: ["b.com", "b.com", "c.com"], 2: ["d.com", "a.com", "b.com"]}
+    for index, domains in layout.items():
+        for user_id, domain in zip(user_ids[index], domains):
+            sharded_model.shards[index].insert_user(f"User {user_id}", f"user{user_id}@{domain}", "hash", user_id=user_id)
+    
+    stats = sharded_model.get_stats(domains=1)
+    assert stats['email_domains'] == {'b.com': 4}
+    assert stats['email_domains_other'] == 5
+
+def test_rebalance_from_single_database(temp_dir):
+    """Test moving an unsharded database onto shards keeps users and IDs"""
+    source_path = os.path.join(temp_dir, "users.db")
+    source = User(source_path)
+    user_ids = [
+        source.create_user(f"User {i}", f"user{i}@example.com", "password123")
+        for i in range(5)
+    ]
+    
+    target_paths = [os.path.join(temp_dir, f"target{i}.db") for i in range(2)]
+    assert rebalance_shards([source_path], target_paths, batch_size=2) == 5
+    
+    target = ShardedUser(target_paths)
+    assert [u['id'] for u in target.get_all_users()] == user_ids
+    assert target.authenticate_user("user3@example.com", "password123")['id'] == user_ids[3]
+    assert target.get_stats()['total_users'] == 5
+    
+    # New IDs continue past the copied ones
+    assert target.create_user("New User", "new@example.com", "password123") > max(user_ids)
+
+def test_rebalance_rejects_overlapping_targets(temp_dir):
+    """Test rebalancing refuses to write over its own sources"""
+    path = os.path.join(temp_dir, "users.db")
+    User(path)
+    with pytest.raises(ValueError):
+        rebalance_shards([path], [path])
+
+def test_rebalance_rejects_non_empty_targets(temp_dir):
+    """Test rebalancing refuses targets that already hold users"""
+    source_path = os.path.join(temp_dir, "users.db")
+    User(source_path).create_user("Test User", "test@example.com", "password123")
+    target_path = os.path.join(temp_dir, "target.db")
+    User(target_path).create_user("Other User", "other@example.com", "password123")
+    
+    with pytest.raises(ValueError):
+        rebalance_shards([source_path], [target_path])
+
+def test_existing_users_indexed_on_first_start(temp_dir):
+    """Test users of a former unsharded database can log in and keep their emails"""
+    path = os.path.join(temp_dir, "users.db")
+    user_id = User(path).create_user("Test User", "test@example.com", "password123")
+    
+    sharded = ShardedUser([path])
+    assert sharded.authenticate_user("test@example.com", "password123")['id'] == user_id
+    assert sharded.create_user("Copy", "test@example.com", "password123") is None
+
+def test_duplicate_emails_across_shards_refused(temp_dir):
+    """Test shards that cannot get a consistent email index stop startup"""
+    paths = [os.path.join(temp_dir, f"shard{i}.db") for i in range(2)]
+    User(paths[0]).create_user("First", "test@example.com", "password123", user_id=2)
+    User(paths[1]).create_user("Second", "test@example.com", "password123", user_id=1)
+    
+    with pytest.raises(ValueError, match="duplicate emails"):
+        ShardedUser(paths)
+
+def test_concurrent_first_start(temp_dir):
+    """Test workers starting together on a new set seed it once and never see false duplicates"""
+    paths = [os.path.join(temp_dir, f"shard{i}.db") for i in range(3)]
+    for path in paths:
+        User(path)
+    
+    def start_and_write(worker):
+        model = ShardedUser(paths, id_block_size=5)
+        return [model.insert_user(f"User {worker}-{i}", f"user{worker}-{i}@example.com", "hash") for i in range(20)]
+    
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(start_and_write, range(8)))
+    
+    user_ids = [user_id for ids in results for user_id in ids]
+    assert None not in user_ids
+    assert len(set(user_ids)) == 160
+    assert ShardedUser(paths).get_stats()['total_users'] == 160
+
+def test_misplaced_existing_users_refused(temp_dir):
+    """Test users whose ID routes to another shard stop startup instead of vanishing"""
+    paths = [os.path.join(temp_dir, name) for name in ("a.db", "b.db")]
+    user_model = User(paths[0])
+    for i in range(4):
+        user_model.create_user(f"User {i}", f"user{i}@example.com", "password123")
+    
+    with pytest.raises(ValueError, match="rebalance_shards.py"):
+        ShardedUser(paths)
+
+def test_reordered_or_resized_shards_refused(temp_dir):
+    """Test shards only open in the position and count they were created with"""
+    paths = [os.path.join(temp_dir, f"shard{i}.db") for i in range(3)]
+    ShardedUser(paths).create_user("Test User", "test@example.com", "password123")
+    
+    with pytest.raises(ValueError, match="shard 0 of 3"):
+        ShardedUser(list(reversed(paths)))
+    with pytest.raises(ValueError, match="of 3"):
+        ShardedUser(paths + [os.path.join(temp_dir, "shard3.db")])
+    with pytest.raises(ValueError, match="of 3"):
+        ShardedUser(paths[:2])
+    
+    assert ShardedUser(paths).authenticate_user("test@example.com", "password123") is not None
+
+def test_failed_shard_write_releases_email(sharded_model, monkeypatch):
+    """Test an email claimed for a write that raises can be used again"""
+    def fail(*args, **kwargs):
+        raise RuntimeError("disk full")
+    
+    for shard in sharded_model.shards:
+        monkeypatch.setattr(shard, 'insert_user', fail)
+    with pytest.raises(RuntimeError):
+        sharded_model.create_user("Test User", "test@example.com", "password123")
+    monkeypatch.undo()
+    assert sharded_model.create_user("Test User", "test@example.com", "password123") is not None
+    
+    user_id = sharded_model.create_user("Other User", "other@example.com", "password123")
+    monkeypatch.setattr(sharded_model.shard_for_id(user_id), 'update_user', fail)
+    with pytest.raises(RuntimeError):
+        sharded_model.update_user(user_id, email="new@example.com")
+    monkeypatch.undo()
+    assert sharded_model.create_user("New User", "new@example.com", "password123") is not None
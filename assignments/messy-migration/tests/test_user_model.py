@@ -1,6 +1,7 @@
 import pytest
 import tempfile
 import os
+import sqlite3
 from models.user import User
 
 @pytest.fixture
@@ -87,4 +88,114 @@ def test_search_users(user_model):
     
     results = user_model.search_users_by_name("Smith")
     assert len(results) == 1
-    assert results[0]['name'] == "Jane Smith"
\ No newline at end of file
+    assert results[0]['name'] == "Jane Smith"
+
+def test_get_stats(user_model):
+    """Test precomputed user statistics"""
+    user_id = user_model.create_user("John Doe", "john@example.com", "password123")
+    user_model.create_user("Jane Smith", "jane@example.com", "password456")
+    user_model.create_user("Bob Johnson", "bob@other.org", "qwerty789")
+    
+    stats = user_model.get_stats()
+    assert stats['total_users'] == 3
+    assert sum(stats['signups_per_day'].values()) == 3
+    assert sum(stats['signups_per_hour'].values()) == 3
+    assert stats['email_domains'] == {'example.com': 2, 'other.org': 1}
+    
+    # Email change moves the user between domains
+    user_model.update_user(user_id, email="john@other.org")
+    stats = user_model.get_stats()
+    assert stats['email_domains'] == {'example.com': 1, 'other.org': 2}
+    
+    # Deletion is reflected without rescanning
+    user_model.delete_user(user_id)
+    stats = user_model.get_stats()
+    assert stats['total_users'] == 2
+    assert sum(stats['signups_per_day'].values()) == 2
+    assert stats['email_domains'] == {'example.com': 1, 'other.org': 1}
+
+def test_get_stats_backfills_existing_users(temp_db):
+    """Test summary tables are backfilled for a database created before them"""
+    with sqlite3.connect(temp_db) as conn:
+        conn.execute('''
+            CREATE TABLE users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                email TEXT UNIQUE NOT NULL,
+                password_hash TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.execute(
+            "INSERT INTO users (name, email, password_hash, created_at) VALUES (?, ?, ?, ?)",
+            ("Old User", "old@example.com", "x", "2024-01-02 03:04:05")
+        )
+    
+    stats = User(temp_db).get_stats(days=None, hours=None)
+    assert stats['total_users'] == 1
+    assert stats['signups_per_day'] == {'2024-01-02': 1}
+    assert stats['signups_per_hour'] == {'2024-01-02 03:00': 1}
+    assert stats['email_domains'] == {'example.com': 1}
+
+def test_get_stats_windows_signups(user_model):
+    """Test signups are limited to recent buckets unless the window is widened"""
+    user_model.create_user("New User", "new@example.com", "password123")
+    with user_model._get_connection() as conn:
+        conn.execute(
+            "INSERT INTO users (name, email, password_hash, created_at) VALUES (?, ?, ?, datetime('now', '-30 days'))",
+            ("Old User", "old@example.com", "x")
+        )
+    
+    stats = user_model.get_stats()
+    assert stats['total_users'] == 2
+    assert sum(stats['signups_per_day'].values()) == 2
+    assert sum(stats['signups_per_hour'].values()) == 1
+    
+    stats = user_model.get_stats(days=1, hours=24 * 31)
+    assert sum(stats['signups_per_day'].values()) == 1
+    assert sum(stats['signups_per_hour'].values()) == 2
+
+def test_get_stats_top_domains(user_model):
+    """Test only the largest email domains are listed, the rest summed as other"""
+    for i, domain in enumerate(["a.com", "a.com", "a.com", "b.com", "b.com", "c.com", "d.com"]):
+        user_model.create_user(f"User {i}", f"user{i}@{domain}", "password123")
+    
+    stats = user_model.get_stats(domains=2)
+    assert stats['email_domains'] == {'a.com': 3, 'b.com': 2}
+    assert stats['email_domains_other'] == 2
+    
+    stats = user_model.get_stats(domains=None)
+    assert stats['email_domains'] == {'a.com': 3, 'b.com': 2, 'c.com': 1, 'd.com': 1}
+    assert stats['email_domains_other'] == 0
+    
+    with user_model._get_connection() as conn:
+        plan = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT domain, users FROM user_email_domains ORDER BY users DESC, domain LIMIT 2"
+        ).fetchall()
+    assert any('idx_user_email_domains_users' in row[-1] for row in plan)
+
+def test_iter_all_users(user_model):
+    """Test streaming all users in ID order"""
+    ids = [
+        user_model.create_user(f"User {i}", f"user{i}@example.com", "password123")
+        for i in range(3)
+    ]
+    
+    users = list(user_model.iter_all_users(batch_size=2))
+    assert [u['id'] for u in users] == ids
+    assert all('password_hash' not in u for u in users)
+
+def test_iter_all_users_does_not_block_writers(user_model):
+    """Test a partly consumed user stream holds no lock that blocks inserts"""
+    for i in range(3):
+        user_model.insert_user(f"User {i}", f"user{i}@example.com", "hash")
+    
+    users = user_model.iter_all_users(batch_size=2)
+    next(users)
+    
+    conn = sqlite3.connect(user_model.db_path, timeout=0)
+    conn.execute("INSERT INTO users (name, email, password_hash) VALUES ('Late', 'late@example.com', 'hash')")
+    conn.commit()
+    conn.close()
+    
+    assert [u['name'] for u in users] == ["User 1", "User 2", "Late"]
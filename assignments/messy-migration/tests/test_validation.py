@@ -1,5 +1,5 @@
 import pytest
-from utils.validation import validate_email, validate_password, validate_name, validate_user_data, validate_user_id
+from utils.validation import validate_email, validate_password, validate_name, validate_user_data, validate_user_id, validate_window
 
 def test_validate_email():
     """Test email validation"""
@@ -53,4 +53,13 @@ def test_validate_user_id():
     assert validate_user_id("0") is None  # Zero not allowed
     assert validate_user_id("-1") is None  # Negative not allowed
     assert validate_user_id("abc") is None  # Non-numeric
-    assert validate_user_id("") is None
\ No newline at end of file
+    assert validate_user_id("") is None
+
+def test_validate_window():
+    """Test window size validation"""
+    assert validate_window(None, 7, 30) == 7  # Default when absent
+    assert validate_window("", 7, 30) == 7
+    assert validate_window("30", 7, 30) == 30
+    assert validate_window("31", 7, 30) is None  # Above the maximum
+    assert validate_window("0", 7, 30) is None
+    assert validate_window("abc", 7, 30) is None
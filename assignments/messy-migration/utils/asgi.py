@@ -0,0 +1,276 @@
+import asyncio
+import itertools
+import json
+import re
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple, Union
+from urllib.parse import parse_qsl
+from limits import parse
+from limits.storage import MemoryStorage
+from limits.strategies import MovingWindowRateLimiter
+from utils.responses import error_envelope
+from utils.compression import gzip_stream, gzip_accepted
+
+logger = logging.getLogger(__name__)
+
+class StreamedBody:
+    """A JSON response body sent chunk by chunk as the chunks are produced
+    
+    chunks is a blocking iterator; run advances an iterator off the event
+    loop (e.g. AsyncUser.iterate), and is also used for compressing it.
+    """
+    
+    def __init__(self, chunks: Iterator[str], run: Callable[[Iterator[Any]], AsyncIterator[Any]]):
+        self.chunks = chunks
+        self.run = run
+
+# A handler returns (envelope, status_code), mirroring the Flask response
+# helpers, or (StreamedBody, status_code) for bodies too large to buffer
+Handler = Callable[..., Awaitable[Tuple[Union[Dict[str, Any], StreamedBody], int]]]
+
+def client_address(scope: Dict[str, Any]) -> str:
+    """Get the client IP of a connection, as used for rate limiting"""
+    return scope['client'][0] if scope.get('client') else '127.0.0.1'
+
+def encode_json(body: Dict[str, Any]) -> bytes:
+    """Serialize a response envelope the way the Flask app does"""
+    return json.dumps(body, separators=(',', ':'), sort_keys=True, default=str).encode('utf-8') + b'\n'
+
+def header_value(scope: Dict[str, Any], name: str) -> str:
+    """Get a request header from the scope, '' if it is missing"""
+    encoded = name.lower().encode('latin-1')
+    for header, value in scope['headers']:
+        if header.lower() == encoded:
+            return value.decode('latin-1')
+    return ''
+
+class AsgiRequest:
+    """The parts of an HTTP request the route handlers need"""
+    
+    def __init__(self, scope: Dict[str, Any], body: bytes):
+        self.method = scope['method']
+        self.path = scope['path']
+        self.headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+        self.args = dict(parse_qsl(scope.get('query_string', b'').decode('utf-8')))
+        self.remote_addr = client_address(scope)
+        self.body = body
+    
+    def get_json(self) -> Any:
+        """Parse the body as JSON, None if it is missing or invalid"""
+        try:
+            return json.loads(self.body) if self.body else None
+        except ValueError:
+            return None
+
+class Router:
+    """Maps method and path patterns such as /user/<user_id> to async handlers"""
+    
+    def __init__(self):
+        self.routes: List[Tuple[re.Pattern, List[str], Handler, Optional[str]]] = []
+    
+    def route(self, path: str, methods: List[str] = None, limit: str = None):
+        """Register a handler; limit is a rate limit string like "50 per minute" """
+        pattern = re.compile('^' + re.sub(r'<(\w+)>', r'(?P<\1>[^/]+)', path) + '$')
+        
+        def decorator(handler: Handler) -> Handler:
+            self.routes.append((pattern, methods or ['GET'], handler, limit))
+            return handler
+        return decorator
+    
+    def include(self, other: 'Router'):
+        """Add every route of another router after this one's"""
+        self.routes.extend(other.routes)
+    
+    def match(self, method: str, path: str) -> Tuple[Optional[Handler], Dict[str, str], Optional[str], int]:
+        """Find the handler for a request, with its path params, limit and a 404/405 status if none
+        
+        HEAD is answered by the GET handler, as Flask does.
+        """
+        status_code = 404
+        for pattern, methods, handler, limit in self.routes:
+            match = pattern.match(path)
+            if not match:
+                continue
+            if method in methods or (method == 'HEAD' and 'GET' in methods):
+                return handler, match.groupdict(), limit, 200
+            status_code = 405
+        return None, {}, None, status_code
+
+class RateLimiter:
+    """In-memory moving-window rate limits per client address and route"""
+    
+    def __init__(self, default_limit: str, enabled: bool = True):
+        self.default_limit = default_limit
+        self.enabled = enabled
+        self._strategy = MovingWindowRateLimiter(MemoryStorage())
+    
+    def hit(self, limit: Optional[str], endpoint: str, key: str) -> bool:
+        """Count a request, False if it exceeds the limit"""
+        if not self.enabled:
+            return True
+        return self._strategy.hit(parse(limit or self.default_limit), endpoint, key)
+
+class AsgiApp:
+    """ASGI application dispatching JSON requests through a Router"""
+    
+    def __init__(self, router: Router, limiter: RateLimiter, max_body_size: int = 1024 * 1024,
+                 on_shutdown: List[Callable[[], None]] = None, compression_level: int = 6,
+                 compression_min_size: int = 1024):
+        self.router = router
+        self.limiter = limiter
+        self.max_body_size = max_body_size
+        self.on_shutdown = on_shutdown or []
+        self.compression_level = compression_level
+        self.compression_min_size = compression_min_size
+    
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            body, status_code = await self._handle(scope, receive)
+            gzip = gzip_accepted(header_value(scope, 'Accept-Encoding'))
+            if scope['method'] == 'HEAD':
+                await self._send_head(send, body, status_code)
+            elif isinstance(body, StreamedBody):
+                await self._send_stream(send, receive, body, status_code, gzip)
+            else:
+                await self._send_json(send, body, status_code, gzip)
+    
+    async def _lifespan(self, receive: Callable, send: Callable):
+        """Answer server startup and shutdown events"""
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                for callback in self.on_shutdown:
+                    callback()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    
+    async def _read_body(self, receive: Callable) -> Optional[bytes]:
+        """Read the request body, None if it exceeds max_body_size"""
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                break
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > self.max_body_size:
+                return None
+            chunks.append(chunk)
+            if not message.get('more_body', False):
+                break
+        return b''.join(chunks)
+    
+    async def _handle(self, scope: Dict[str, Any], receive: Callable) -> Tuple[Union[Dict[str, Any], StreamedBody], int]:
+        """Route a request and run its handler"""
+        handler, params, limit, status_code = self.router.match(scope['method'], scope['path'])
+        if handler is None:
+            message = "Not found" if status_code == 404 else "Method not allowed"
+            return error_envelope(message), status_code
+        
+        # Check the limit before buffering the body, as Flask-Limiter does
+        if not self.limiter.hit(limit, handler.__name__, client_address(scope)):
+            return error_envelope("Rate limit exceeded"), 429
+        
+        body = await self._read_body(receive)
+        if body is None:
+            return error_envelope("Request body too large"), 413
+        
+        request = AsgiRequest(scope, body)
+        try:
+            return await handler(request, **params)
+        except Exception as e:
+            logger.error(f"Unhandled error on {request.method} {request.path}: {str(e)}")
+            return error_envelope("Internal server error"), 500
+    
+    async def _send_json(self, send: Callable, body: Dict[str, Any], status_code: int, gzip: bool):
+        """Send a complete JSON response, gzipped if accepted and at least compression_min_size"""
+        payload = encode_json(body)
+        headers = [(b'content-type', b'application/json'), (b'vary', b'Accept-Encoding')]
+        if gzip and len(payload) >= self.compression_min_size:
+            payload = b''.join(gzip_stream([payload], self.compression_level))
+            headers.append((b'content-encoding', b'gzip'))
+        await self._send_payload(send, payload, status_code, headers)
+    
+    async def _send_head(self, send: Callable, body: Union[Dict[str, Any], StreamedBody], status_code: int):
+        """Answer HEAD with the headers of the GET response and no body
+        
+        Like the Flask app, HEAD responses are never compressed, and a
+        streamed body is not produced at all.
+        """
+        headers = [(b'content-type', b'application/json')]
+        if not isinstance(body, StreamedBody):
+            headers.append((b'content-length', str(len(encode_json(body))).encode('latin-1')))
+        await send({'type': 'http.response.start', 'status': status_code, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': b''})
+    
+    async def _send_payload(self, send: Callable, payload: bytes, status_code: int, headers: List[Tuple[bytes, bytes]]):
+        """Send a response whose whole body is known"""
+        await send({
+            'type': 'http.response.start',
+            'status': status_code,
+            'headers': headers + [(b'content-length', str(len(payload)).encode('latin-1'))]
+        })
+        await send({'type': 'http.response.body', 'body': payload})
+    
+    async def _wait_for_disconnect(self, receive: Callable):
+        """Return once the client has gone away (the request body is already read)"""
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+    
+    async def _send_stream(self, send: Callable, receive: Callable, body: StreamedBody, status_code: int, gzip: bool):
+        """Send a JSON response chunk by chunk, stopping if the client disconnects
+        
+        When gzip is accepted the body is read until compression_min_size
+        bytes have been seen, then compressed chunk by chunk off the event
+        loop; a body that ends sooner is sent whole and uncompressed.
+        Servers may drop sends to a closed connection silently, so the
+        connection is watched for http.disconnect alongside the sends and
+        no further chunk is produced once it arrives. The status is sent
+        before the first chunk, so an error while streaming propagates to the
+        server, which drops the connection with the body truncated.
+        """
+        disconnected = asyncio.ensure_future(self._wait_for_disconnect(receive))
+        chunks = (chunk.encode('utf-8') for chunk in body.chunks)
+        headers = [(b'content-type', b'application/json'), (b'vary', b'Accept-Encoding')]
+        try:
+            if gzip:
+                head = []
+                size = 0
+                steps = body.run(chunks)
+                try:
+                    while size < self.compression_min_size and not disconnected.done():
+                        try:
+                            chunk = await steps.__anext__()
+                        except StopAsyncIteration:
+                            # The whole body turned out to be small
+                            await self._send_payload(send, b''.join(head), status_code, headers)
+                            return
+                        head.append(chunk)
+                        size += len(chunk)
+                finally:
+                    await steps.aclose()
+                chunks = gzip_stream(itertools.chain(head, chunks), self.compression_level)
+                headers.append((b'content-encoding', b'gzip'))
+            
+            steps = body.run(chunks)
+            try:
+                if not disconnected.done():
+                    await send({'type': 'http.response.start', 'status': status_code, 'headers': headers})
+                while not disconnected.done():
+                    try:
+                        chunk = await steps.__anext__()
+                    except StopAsyncIteration:
+                        await send({'type': 'http.response.body', 'body': b''})
+                        return
+                    if chunk:
+                        await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                logger.info("Client disconnected, stopped streaming the response")
+            finally:
+                await steps.aclose()
+        finally:
+            disconnected.cancel()
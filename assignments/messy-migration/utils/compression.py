@@ -0,0 +1,89 @@
+from flask import Flask, Response, request
+from typing import Iterable, Iterator
+import itertools
+import zlib
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/html', 'text/plain', 'text/csv'}
+
+def gzip_stream(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Gzip a sequence of byte chunks incrementally"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31 = gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+def gzip_accepted(accept_encoding: str) -> bool:
+    """Check whether an Accept-Encoding header value allows gzip (an explicit gzip entry beats *)"""
+    qualities = {}
+    for entry in accept_encoding.split(','):
+        coding, _, params = entry.partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.strip().lower()] = quality
+    return qualities.get('gzip', qualities.get('*', 0.0)) > 0
+
+def accepts_gzip() -> bool:
+    """Check whether the current request's Accept-Encoding allows gzip"""
+    return request.accept_encodings['gzip'] > 0
+
+def compress_response(response: Response, level: int = 6, min_size: int = 1024) -> Response:
+    """Gzip a response if the client accepts it and the body reaches min_size bytes
+    
+    Buffered bodies are compressed in one go. Streamed bodies are read only
+    until min_size bytes have been seen (to decide whether compression is
+    worth it) and are then compressed chunk by chunk as they are sent.
+    """
+    if (request.method == 'HEAD'
+            or response.status_code < 200
+            or response.status_code in (204, 304)
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or 'Content-Encoding' in response.headers):
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    if not accepts_gzip():
+        return response
+    
+    if not response.is_streamed:
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+        response.set_data(b''.join(gzip_stream([data], level)))
+        response.headers['Content-Encoding'] = 'gzip'
+        return response
+    
+    chunks = response.iter_encoded()
+    head = []
+    size = 0
+    for chunk in chunks:
+        head.append(chunk)
+        size += len(chunk)
+        if size >= min_size:
+            break
+    else:
+        # The whole body turned out to be small
+        response.set_data(b''.join(head))
+        return response
+    
+    response.response = gzip_stream(itertools.chain(head, chunks), level)
+    response.direct_passthrough = False
+    response.headers.pop('Content-Length', None)
+    response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+def init_compression(app: Flask):
+    """Register gzip compression of responses, configured by COMPRESSION_LEVEL and COMPRESSION_MIN_SIZE"""
+    level = app.config.get('COMPRESSION_LEVEL', 6)
+    min_size = app.config.get('COMPRESSION_MIN_SIZE', 1024)
+    
+    @app.after_request
+    def _compress(response: Response) -> Response:
+        return compress_response(response, level=level, min_size=min_size)
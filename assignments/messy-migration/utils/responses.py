@@ -1,8 +1,12 @@
-from flask import jsonify
-from typing import Any, Dict, List
+from flask import jsonify, Response
+from typing import Any, Dict, Iterable, Iterator, List
+import json
+import logging
 
-def success_response(data: Any = None, message: str = None, status_code: int = 200):
-    """Create a successful JSON response"""
+logger = logging.getLogger(__name__)
+
+def success_envelope(data: Any = None, message: str = None) -> Dict[str, Any]:
+    """Build the body of a successful response"""
     response_data = {'success': True}
     
     if message:
@@ -10,10 +14,10 @@ def success_response(data: Any = None, message: str = None, status_code: int = 2
     if data is not None:
         response_data['data'] = data
     
-    return jsonify(response_data), status_code
+    return response_data
 
-def error_response(message: str, errors: Dict = None, status_code: int = 400):
-    """Create an error JSON response"""
+def error_envelope(message: str, errors: Dict = None) -> Dict[str, Any]:
+    """Build the body of an error response"""
     response_data = {
         'success': False,
         'message': message
@@ -22,7 +26,15 @@ def error_response(message: str, errors: Dict = None, status_code: int = 400):
     if errors:
         response_data['errors'] = errors
     
-    return jsonify(response_data), status_code
+    return response_data
+
+def success_response(data: Any = None, message: str = None, status_code: int = 200):
+    """Create a successful JSON response"""
+    return jsonify(success_envelope(data, message)), status_code
+
+def error_response(message: str, errors: Dict = None, status_code: int = 400):
+    """Create an error JSON response"""
+    return jsonify(error_envelope(message, errors)), status_code
 
 def validation_error_response(errors: Dict[str, List[str]]):
     """Create a validation error response"""
@@ -30,4 +42,37 @@ def validation_error_response(errors: Dict[str, List[str]]):
         message="Validation failed",
         errors=errors,
         status_code=422
-    )
\ No newline at end of file
+    )
+
+def stream_success_envelope(items: Iterable[Any], batch_size: int = 200) -> Iterator[str]:
+    """Serialize a successful envelope around items piece by piece
+    
+    The joined pieces equal the body of success_response(data=list(items)),
+    but at most batch_size items are held at once. An error from items is
+    logged and re-raised, leaving the body truncated (invalid JSON) rather
+    than closed as a shorter, valid-looking list.
+    """
+    yield '{"data":['
+    batch = []
+    first = True
+    try:
+        for item in items:
+            batch.append(json.dumps(item, separators=(',', ':'), sort_keys=True, default=str))
+            if len(batch) >= batch_size:
+                yield ('' if first else ',') + ','.join(batch)
+                batch = []
+                first = False
+    except Exception as e:
+        logger.error(f"Error while streaming response, body truncated: {str(e)}")
+        raise
+    if batch:
+        yield ('' if first else ',') + ','.join(batch)
+    yield '],"success":true}\n'
+
+def streamed_success_response(items: Iterable[Any], status_code: int = 200, batch_size: int = 200):
+    """Create a successful JSON response whose data list is serialized as it streams
+    
+    The status line is sent before items is consumed, so an error while
+    streaming cannot become an error response; see stream_success_envelope.
+    """
+    return Response(stream_success_envelope(items, batch_size), status=status_code, mimetype='application/json')
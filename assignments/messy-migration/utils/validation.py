@@ -38,4 +38,14 @@ def validate_user_id(user_id: str) -> Optional[int]:
         uid = int(user_id)
         return uid if uid > 0 else None
     except (ValueError, TypeError):
-        return None
\ No newline at end of file
+        return None
+
+def validate_window(value: Optional[str], default: int, maximum: int) -> Optional[int]:
+    """Validate an optional window size query parameter (1..maximum), default when absent"""
+    if value is None or value == '':
+        return default
+    try:
+        window = int(value)
+        return window if 1 <= window <= maximum else None
+    except (ValueError, TypeError):
+        return None